@@ -1,20 +1,48 @@
 # bot.py
 import os
 import time
+import random
 import logging
-import tweepy
 from config import Config
 from twitter_client import TwitterClient
 from translation_service import TranslationService
-from ocr_reader import extract_and_translate_text, save_to_documents, OCRReader
+from ocr_reader import OCRReader
 from upload_doc import ArchiveUploader
-import tempfile
-import requests
+from state_store import StateStore
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+# Number of mentions processed at the same time. Each mention is dominated by
+# network round-trips (tweet lookup, image download, translation, upload);
+# the translation APIs cap their own concurrency and rate, tweepy waits out 429s.
+MAX_CONCURRENT_MENTIONS = 8
+# Threads for local text files and Archive.org uploads, which don't need to
+# hold up the mention workers
+IO_WORKERS = 4
+
 class TwitterBot:
-    def __init__(self):
+    def __init__(self, min_interval=30, max_interval=300, rate=2, full_refresh_interval=3600,
+                 use_stream=True, max_concurrent_mentions=MAX_CONCURRENT_MENTIONS):
+        """
+        Initialize the bot
+        
+        :param min_interval: Seconds to wait between checks while mentions keep arriving
+        :param max_interval: Upper bound on the wait between checks when idle
+        :param rate: Growth factor of the wait for each consecutive idle check
+        :param full_refresh_interval: Seconds between checks that ignore the since_id
+            watermark, so mentions that failed to process get another chance
+        :param use_stream: Receive mentions from the filtered stream when the
+            account has access to it, polling otherwise
+        :param max_concurrent_mentions: Mentions (and pending tweets) processed at the same time
+        """
         self.logger = logging.getLogger(__name__)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.rate = rate
+        self.full_refresh_interval = full_refresh_interval
+        self.use_stream = use_stream
+        self.mention_queue = queue.Queue()  # Mentions pushed by the filtered stream
         self.config = Config()
         self.client = TwitterClient()
         
@@ -26,7 +54,7 @@ class TwitterBot:
                 self.logger.warning("Empty detect API key found in config")
                 detect_api_key = None
             else:
-                self.logger.info(f"Found detect API key (length: {len(detect_api_key)})")
+                self.logger.info("Found detect API key (length: %s)", len(detect_api_key))
         else:
             self.logger.warning("No detect API key found in config")
             detect_api_key = None
@@ -48,97 +76,68 @@ class TwitterBot:
             self.archive_uploader = None
             self.archive_enabled = False
         
-        self.last_processed_id = self._load_last_processed_id()
-        self.processed_mentions_file = "processed_mentions.txt"
-        self.downloaded_tweets_file = "downloaded_tweets.txt"
-        self.pending_tweets_file = "pending_tweets.txt"
-        self.processed_accounts_file = "processed_accounts.txt"  # New file for tracking accounts
-        self.processed_mentions = self.load_processed_mentions()
-        self.downloaded_tweets = self.load_downloaded_tweets()
-        self.pending_tweets = self.load_pending_tweets()
-        self.processed_accounts = self.load_processed_accounts()  # Load processed accounts
+        self.last_processed_id_file = "last_processed_id.txt"
+        self.last_processed_id = self._load_last_processed_id()  # Kept in memory, written on change
+
+        # Processed mentions, downloaded/pending tweets and processed accounts
+        # live in one SQLite database; lookups hit its primary-key index
+        self.state = StateStore("bot_state.db")
+        for kind, legacy_file in (("mention", "processed_mentions.txt"),
+                                  ("downloaded", "downloaded_tweets.txt"),
+                                  ("pending", "pending_tweets.txt"),
+                                  ("account", "processed_accounts.txt")):
+            self.state.import_file(kind, legacy_file)
+        self.processed_mentions = self.state.view("mention")
+        self.downloaded_tweets = self.state.view("downloaded")
+        self.pending_tweets = self.state.view("pending")
+        self.processed_accounts = self.state.view("account")
+
+        self.mention_pool = ThreadPoolExecutor(max_workers=max_concurrent_mentions)
+        self.io_pool = ThreadPoolExecutor(max_workers=IO_WORKERS)
 
     def _load_last_processed_id(self):
         """Load the last processed tweet ID from file"""
         try:
-            with open('last_processed_id.txt', 'r') as f:
-                return f.read().strip()
-        except FileNotFoundError:
+            with open(self.last_processed_id_file, 'r') as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
             return None
 
     def _save_last_processed_id(self, tweet_id):
-        """Save the last processed tweet ID to file"""
-        with open('last_processed_id.txt', 'w') as f:
+        """Save the last processed tweet ID to file if it changed"""
+        tweet_id = int(tweet_id)
+        if tweet_id == self.last_processed_id:
+            return
+        self.last_processed_id = tweet_id
+        
+        # Write to a temporary file and rename so a crash can't leave a partial ID
+        temp_file = f"{self.last_processed_id_file}.tmp"
+        with open(temp_file, 'w') as f:
             f.write(str(tweet_id))
+        os.replace(temp_file, self.last_processed_id_file)
 
     def _extract_original_tweet_id(self, mention):
         """Extract the original tweet ID from a mention"""
-        try:
-            # Get the referenced tweets from the mention
-            if hasattr(mention, 'referenced_tweets'):
-                for ref in mention.referenced_tweets:
-                    if ref.type == 'replied_to':
-                        return ref.id
-            return None
-        except Exception as e:
-            self.logger.error(f"Error extracting original tweet ID: {str(e)}")
-            return None
-
-    def _process_tweet(self, mention):
-        """Process a mention and translate the original tweet"""
-        try:
-            # Skip if we've already processed this mention
-            if self.last_processed_id and str(mention.id) <= self.last_processed_id:
-                return
-
-            # Get the original tweet ID
-            original_tweet_id = self._extract_original_tweet_id(mention)
-            if not original_tweet_id:
-                self.logger.warning(f"Could not find original tweet ID in mention {mention.id}")
-                return
-
-            # Get the original tweet
-            original_tweet = self.client.get_tweet(original_tweet_id)
-            if not original_tweet:
-                self.logger.warning(f"Could not get original tweet {original_tweet_id}")
-                return
-
-            # Get tweet text
-            text = original_tweet.text
-            
-            # Check if tweet has media
-            if hasattr(original_tweet, 'attachments') and original_tweet.attachments:
-                # Download and process image
-                image_url = self.client.get_media_url(original_tweet_id)
-                if image_url:
-                    text = self.ocr.extract_text(image_url)
-            
-            # Detect language and translate
-            detected_lang = self.translator.detect_language(text)
-            if detected_lang and detected_lang != 'en':
-                translated_text = self.translator.translate_text(text, detected_lang)
-                if translated_text:
-                    # Save translation to Archive.org
-                    self._upload_to_archive(text, translated_text, detected_lang, original_tweet_id)
-            else:
-                self.logger.info(f"No translation needed for tweet {original_tweet_id} (language: {detected_lang})")
-            
-            # Update last processed ID
-            self._save_last_processed_id(mention.id)
-            
-        except Exception as e:
-            self.logger.error(f"Error processing mention {mention.id}: {str(e)}")
+        # tweepy always sets referenced_tweets, to None when the mention isn't a reply
+        for ref in mention.referenced_tweets or ():
+            if ref.type == 'replied_to':
+                return ref.id
+        return None
 
-    def _upload_to_archive(self, original_text, translated_text, detected_lang, tweet_id):
-        """Upload translation to Archive.org"""
+    def _upload_to_archive(self, original_text, translated_text, detected_lang, tweet_id, started=None):
+        """
+        Upload translation to Archive.org
+        
+        :param started: When processing of the tweet started, used in the filename (defaults to now)
+        """
         # Skip if Archive.org integration is disabled
         if not self.archive_enabled or not self.archive_uploader:
-            self.logger.info(f"Skipping Archive.org upload for tweet {tweet_id} - integration disabled")
+            self.logger.debug("Skipping Archive.org upload for tweet %s - integration disabled", tweet_id)
             return False
             
         try:
             # Create a filename with timestamp and tweet ID
-            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+            timestamp = (started or datetime.now()).strftime("%Y%m%d%H%M%S")
             filename = f"extracted_texts/tweet_{tweet_id}_{timestamp}.txt"
             
             # Upload to Archive.org
@@ -151,195 +150,114 @@ class TwitterBot:
             )
             
             if archive_url:
-                self.logger.info(f"Translation for tweet {tweet_id} archived at: {archive_url}")
+                self.logger.info("Translation for tweet %s archived at: %s", tweet_id, archive_url)
                 
                 # Post only the archive link as a reply to the original tweet
                 reply_text = f"Translation ({detected_lang} → en) available at: {archive_url}. No downloading required."
                 
                 # Post the reply with just the archive link
                 self.client.post_reply(tweet_id, reply_text)
-                self.logger.info(f"Posted archive link as reply to tweet {tweet_id}")
+                self.logger.info("Posted archive link as reply to tweet %s", tweet_id)
                 return True
             else:
-                self.logger.warning(f"Failed to archive translation for tweet {tweet_id}")
+                self.logger.warning("Failed to archive translation for tweet %s", tweet_id)
                 return False
                 
         except Exception as e:
-            self.logger.error(f"Error uploading to Archive.org: {str(e)}")
+            self.logger.error("Error uploading to Archive.org: %s", e)
             return False
 
-    def save_processed_mention(self, mention_id):
-        """Save a processed mention ID to the file"""
-        try:
-            # First check if it's already in our in-memory set
-            if str(mention_id) in self.processed_mentions:
-                self.logger.info(f"Skipping already processed mention {mention_id}")
-                return
-
-            # Then check the file directly to be extra safe
-            if os.path.exists(self.processed_mentions_file):
-                with open(self.processed_mentions_file, 'r') as f:
-                    if str(mention_id) in [line.strip() for line in f]:
-                        self.logger.info(f"Found mention {mention_id} in file, skipping")
-                        return
-
-            # If we get here, it's a new mention
-            self.processed_mentions.add(str(mention_id))
-            
-            # Use a temporary file for atomic write
-            temp_file = f"{self.processed_mentions_file}.tmp"
-            with open(temp_file, 'w') as f:
-                # Write all existing mentions
-                if os.path.exists(self.processed_mentions_file):
-                    with open(self.processed_mentions_file, 'r') as old_f:
-                        for line in old_f:
-                            f.write(line)
-                # Write the new mention
-                f.write(f"{mention_id}\n")
-            
-            # Atomic rename
-            os.replace(temp_file, self.processed_mentions_file)
-            
-            # Reload processed mentions to ensure we have the latest data
-            self.processed_mentions = self.load_processed_mentions()
-            
-        except Exception as e:
-            self.logger.error(f"Error saving processed mention: {e}")
-            # Clean up temp file if it exists
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
-
-    def load_processed_mentions(self):
-        """Load the list of already processed mention IDs"""
+    def _write_text_file(self, path, text):
+        """Write text to a local file (runs on the I/O pool)"""
         try:
-            if os.path.exists(self.processed_mentions_file):
-                with open(self.processed_mentions_file, 'r') as f:
-                    # Use a set to ensure uniqueness
-                    return set(line.strip() for line in f)
-            return set()
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            self.logger.debug("Saved text to %s", path)
         except Exception as e:
-            self.logger.error(f"Error loading processed mentions: {e}")
-            return set()
+            self.logger.error("Error saving text to %s: %s", path, e)
 
-    def load_downloaded_tweets(self):
-        """Load the list of downloaded tweet IDs"""
+    def save_processed_mention(self, mention_id):
+        """Record a processed mention ID"""
         try:
-            if os.path.exists(self.downloaded_tweets_file):
-                with open(self.downloaded_tweets_file, 'r') as f:
-                    return set(line.strip() for line in f)
-            return set()
+            if not self.processed_mentions.add(mention_id):
+                self.logger.debug("Skipping already processed mention %s", mention_id)
         except Exception as e:
-            self.logger.error(f"Error loading downloaded tweets: {e}")
-            return set()
+            self.logger.error("Error saving processed mention: %s", e)
 
     def save_downloaded_tweet(self, tweet_id):
-        """Save a downloaded tweet ID to the file"""
+        """Record a downloaded tweet ID"""
         try:
-            with open(self.downloaded_tweets_file, 'a') as f:
-                f.write(f"{tweet_id}\n")
             self.downloaded_tweets.add(tweet_id)
         except Exception as e:
-            self.logger.error(f"Error saving downloaded tweet: {e}")
-
-    def load_pending_tweets(self):
-        """Load the list of tweets waiting for image download"""
-        try:
-            if os.path.exists(self.pending_tweets_file):
-                with open(self.pending_tweets_file, 'r') as f:
-                    return set(line.strip() for line in f)
-            return set()
-        except Exception as e:
-            self.logger.error(f"Error loading pending tweets: {e}")
-            return set()
+            self.logger.error("Error saving downloaded tweet: %s", e)
 
     def save_pending_tweet(self, tweet_id):
-        """Save a tweet ID that needs image download"""
+        """Record a tweet ID that needs image download"""
         try:
-            with open(self.pending_tweets_file, 'a') as f:
-                f.write(f"{tweet_id}\n")
             self.pending_tweets.add(tweet_id)
         except Exception as e:
-            self.logger.error(f"Error saving pending tweet: {e}")
+            self.logger.error("Error saving pending tweet: %s", e)
 
     def remove_pending_tweet(self, tweet_id):
         """Remove a tweet from the pending list"""
         try:
-            self.pending_tweets.remove(tweet_id)
-            with open(self.pending_tweets_file, 'w') as f:
-                for tweet in self.pending_tweets:
-                    f.write(f"{tweet}\n")
-        except Exception as e:
-            self.logger.error(f"Error removing pending tweet: {e}")
-
-    def load_processed_accounts(self):
-        """Load the list of account IDs we've already processed"""
-        try:
-            if os.path.exists(self.processed_accounts_file):
-                with open(self.processed_accounts_file, 'r') as f:
-                    return set(line.strip() for line in f)
-            return set()
+            self.pending_tweets.discard(tweet_id)
         except Exception as e:
-            self.logger.error(f"Error loading processed accounts: {e}")
-            return set()
+            self.logger.error("Error removing pending tweet: %s", e)
 
     def save_processed_account(self, account_id):
-        """Save an account ID to the processed accounts file"""
+        """Record an account ID we've processed"""
         try:
-            with open(self.processed_accounts_file, 'a') as f:
-                f.write(f"{account_id}\n")
             self.processed_accounts.add(account_id)
-            self.logger.info(f"Saved processed account ID: {account_id}")
+            self.logger.debug("Saved processed account ID: %s", account_id)
         except Exception as e:
-            self.logger.error(f"Error saving processed account: {e}")
+            self.logger.error("Error saving processed account: %s", e)
 
-    def process_mention(self, mention):
-        """Process a single mention"""
+    def process_mention(self, mention, original_tweet=None):
+        """
+        Process a single mention
+        
+        :param mention: Mention to process
+        :param original_tweet: The tweet the mention replies to, if already fetched
+        """
         try:
-            self.logger.info(f"Starting to process mention {mention.id}")
+            self.logger.debug("Starting to process mention %s", mention.id)
             
             # Skip if we've already processed this mention
             if str(mention.id) in self.processed_mentions:
-                self.logger.info(f"Skipping already processed mention {mention.id}")
+                self.logger.debug("Skipping already processed mention %s", mention.id)
                 return
 
             # Get the original tweet if this is a reply
-            original_tweet_id = None
-            if mention.referenced_tweets:
-                for ref in mention.referenced_tweets:
-                    if ref.type == 'replied_to':
-                        original_tweet_id = ref.id
-                        break
+            original_tweet_id = self._extract_original_tweet_id(mention)
+            
+            # One timestamp names all the files written for this mention
+            started = datetime.now()
+            timestamp = started.strftime("%Y%m%d_%H%M%S")
 
             if original_tweet_id:
-                self.logger.info(f"Found original tweet ID: {original_tweet_id}")
+                self.logger.debug("Found original tweet ID: %s", original_tweet_id)
                 
                 # Skip if we've already processed this original tweet
                 if str(original_tweet_id) in self.processed_mentions:
-                    self.logger.info(f"Skipping already processed original tweet {original_tweet_id}")
+                    self.logger.debug("Skipping already processed original tweet %s", original_tweet_id)
                     return
 
-                # Get the original tweet
-                original_tweet = self.client.get_tweet(original_tweet_id)
+                # Get the original tweet, unless it came with the batch lookup
+                if original_tweet is None:
+                    original_tweet = self.client.get_tweet(original_tweet_id)
                 if not original_tweet:
-                    self.logger.warning(f"Could not get original tweet {original_tweet_id}")
+                    self.logger.warning("Could not get original tweet %s", original_tweet_id)
                     return
 
                 # Get tweet text
                 text = original_tweet.text
                 
                 # Check if tweet has media
-                if hasattr(original_tweet, 'attachments') and original_tweet.attachments:
-                    # Check if we've already processed this account
-                    author_id = str(original_tweet.author_id)
-                    if author_id in self.processed_accounts:
-                        self.logger.info(f"Already processed account {author_id}, using cached media URL")
-                        # For processed accounts, we can use the cached media URL directly
-                        image_url = self.client.get_cached_media_url(original_tweet_id)
-                    else:
-                        # For new accounts, get the media URL normally
-                        image_url = self.client.get_media_url(original_tweet_id)
-                        # Save the account ID after processing
-                        self.save_processed_account(author_id)
+                if original_tweet.attachments:
+                    # get_media_url checks the media URL cache before any lookup
+                    image_url = self.client.get_media_url(original_tweet_id)
+                    self.save_processed_account(str(original_tweet.author_id))
 
                     if image_url:
                         try:
@@ -347,18 +265,16 @@ class TwitterBot:
                             extracted_text = self.ocr.extract_text(image_url)
                             if extracted_text:
                                 text = extracted_text
-                                self.logger.info(f"Successfully extracted text from image for tweet {original_tweet_id}")
+                                self.logger.debug("Successfully extracted text from image for tweet %s", original_tweet_id)
                                 
                                 # Save the extracted text
-                                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                                 extracted_text_filename = f"tweet_{original_tweet_id}_{timestamp}_extracted.txt"
-                                with open(os.path.join("extracted_texts", extracted_text_filename), 'w', encoding='utf-8') as f:
-                                    f.write(text)
-                                self.logger.info(f"Saved extracted text to {extracted_text_filename}")
+                                self.io_pool.submit(self._write_text_file,
+                                                    os.path.join("extracted_texts", extracted_text_filename), text)
                             else:
-                                self.logger.warning(f"No text extracted from image for tweet {original_tweet_id}")
+                                self.logger.warning("No text extracted from image for tweet %s", original_tweet_id)
                         except Exception as e:
-                            self.logger.error(f"Error processing image for tweet {original_tweet_id}: {str(e)}")
+                            self.logger.error("Error processing image for tweet %s: %s", original_tweet_id, e)
                             # Continue with original text if image processing fails
                 
                 # Detect language and translate
@@ -367,120 +283,206 @@ class TwitterBot:
                     translated_text = self.translator.translate_text(text, source_language=detected_lang)
                     if translated_text:
                         # Save the translated text locally
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                         translated_text_filename = f"tweet_{original_tweet_id}_{timestamp}_translated.txt"
-                        with open(os.path.join("extracted_texts", translated_text_filename), 'w', encoding='utf-8') as f:
-                            f.write(translated_text)
-                        self.logger.info(f"Saved translated text to {translated_text_filename}")
+                        self.io_pool.submit(self._write_text_file,
+                                            os.path.join("extracted_texts", translated_text_filename), translated_text)
                         
-                        # Upload translation to Archive.org (this will post the archive link as a reply)
-                        self._upload_to_archive(text, translated_text, detected_lang, original_tweet_id)
+                        # Upload translation to Archive.org in the background (this will
+                        # post the archive link as a reply)
+                        self.io_pool.submit(self._upload_to_archive, text, translated_text, detected_lang,
+                                            original_tweet_id, started)
                         
                         # Save both the mention ID and original tweet ID to processed mentions
                         self.save_processed_mention(mention.id)
                         self.save_processed_mention(original_tweet_id)
                 else:
-                    self.logger.info(f"No translation needed for tweet {original_tweet_id} (language: {detected_lang})")
+                    self.logger.info("No translation needed for tweet %s (language: %s)", original_tweet_id, detected_lang)
                     # Still save both IDs to prevent reprocessing
                     self.save_processed_mention(mention.id)
                     self.save_processed_mention(original_tweet_id)
                 
         except Exception as e:
-            self.logger.error(f"Error processing mention {mention.id}: {str(e)}")
+            self.logger.error("Error processing mention %s: %s", mention.id, e)
 
     def process_pending_tweets(self):
         """Process tweets that are waiting for image download"""
-        self.logger.info(f"Starting to process {len(self.pending_tweets)} pending tweets")
-        for tweet_id in list(self.pending_tweets):  # Create a copy to iterate
-            try:
-                self.logger.info(f"Processing pending tweet {tweet_id}")
-                # Get the media URL
-                self.logger.info(f"Getting media URL for pending tweet {tweet_id}")
-                media_url = self.client.get_media_url(tweet_id)
-                if media_url:
-                    self.logger.info(f"Found media URL for pending tweet {tweet_id}")
-                    # Download the image
-                    self.logger.info(f"Downloading image for pending tweet {tweet_id}")
-                    image_path = self.ocr.download_image(media_url)
-                    if image_path:
-                        self.logger.info(f"Successfully downloaded image for tweet {tweet_id}")
-                        # Save as downloaded
-                        self.save_downloaded_tweet(tweet_id)
-                        # Remove from pending
-                        self.remove_pending_tweet(tweet_id)
-                        self.logger.info(f"Removed tweet {tweet_id} from pending list")
-                        
-                        # Process the image
-                        try:
-                            self.logger.info(f"Extracting text from downloaded image for tweet {tweet_id}")
-                            extracted_text = self.ocr.extract_text(image_path)
-                            if extracted_text:
-                                self.logger.info(f"Successfully extracted text from tweet {tweet_id}")
-                                detected_lang = self.translator.detect_language(extracted_text)
-                                if detected_lang and detected_lang != 'en':
-                                    self.logger.info(f"Detected non-English language ({detected_lang}) for tweet {tweet_id}")
-                                    translated_text = self.translator.translate_text(extracted_text)
-                                    if translated_text:
-                                        self.logger.info(f"Successfully translated text from tweet {tweet_id}")
-                                        self.save_processed_mention(tweet_id)
-                                        
-                                        # Upload translation to Archive.org
-                                        self._upload_to_archive(extracted_text, translated_text, detected_lang, tweet_id)
-                            else:
-                                self.logger.warning(f"No text extracted from downloaded image for tweet {tweet_id}")
-                        finally:
-                            self.logger.info(f"Cleaning up downloaded image for tweet {tweet_id}")
-                            self.ocr.cleanup_image(image_path)
-                else:
-                    self.logger.warning(f"No media URL found for pending tweet {tweet_id}")
-            except Exception as e:
-                if "Rate limit exceeded" in str(e):
-                    self.logger.warning(f"Rate limit hit while processing pending tweet {tweet_id}")
-                else:
-                    self.logger.error(f"Error processing pending tweet {tweet_id}: {e}")
+        pending = list(self.pending_tweets)  # Create a copy to iterate
+        self.logger.info("Starting to process %s pending tweets", len(pending))
+        
+        # Look up the media URLs concurrently, then OCR all images in one batch
+        media_urls = self.client.get_media_urls(pending)
+        tweet_ids = []
+        for tweet_id in pending:
+            if media_urls[tweet_id]:
+                tweet_ids.append(tweet_id)
+            else:
+                self.logger.warning("No media URL found for pending tweet %s", tweet_id)
+        if not tweet_ids:
+            return
+        texts = self.ocr.extract_text_batch([media_urls[tweet_id] for tweet_id in tweet_ids])
+        
+        # Same worker pool as mentions: detection is network I/O
+        languages = list(self.mention_pool.map(self._detect_pending_language, texts))
+        
+        # Send the translations of the whole batch at once rather than tweet by tweet
+        to_translate = [i for i, lang in enumerate(languages) if lang and lang != 'en']
+        translations = [None] * len(tweet_ids)
+        for i, translated_text in zip(to_translate, self.translator.translate_texts(
+                [texts[i] for i in to_translate], [languages[i] for i in to_translate])):
+            translations[i] = translated_text
+        
+        for tweet_id, text, lang, translated_text in zip(tweet_ids, texts, languages, translations):
+            self._process_pending_text(tweet_id, text, lang, translated_text)
+
+    def _detect_pending_language(self, extracted_text):
+        """Language of the text extracted from a pending tweet's image, or None if there is none"""
+        if not extracted_text:
+            return None
+        return self.translator.detect_language(extracted_text)
+
+    def _process_pending_text(self, tweet_id, extracted_text, detected_lang, translated_text):
+        """Record a pending tweet's result and archive its translation"""
+        try:
+            if extracted_text is None:
+                # Download or OCR failed, keep the tweet pending for the next round
+                return
+            self.save_downloaded_tweet(tweet_id)
+            self.remove_pending_tweet(tweet_id)
+
+            if extracted_text:
+                self.logger.debug("Successfully extracted text from tweet %s", tweet_id)
+                if detected_lang and detected_lang != 'en':
+                    self.logger.info("Detected non-English language (%s) for tweet %s", detected_lang, tweet_id)
+                    if translated_text:
+                        self.logger.debug("Successfully translated text from tweet %s", tweet_id)
+                        self.save_processed_mention(tweet_id)
+
+                        # Upload translation to Archive.org in the background
+                        self.io_pool.submit(self._upload_to_archive, extracted_text, translated_text,
+                                            detected_lang, tweet_id)
+            else:
+                self.logger.warning("No text extracted from downloaded image for tweet %s", tweet_id)
+        except Exception as e:
+            self.logger.error("Error processing pending tweet %s: %s", tweet_id, e)
+
+    def _next_interval(self, idle_index):
+        """Seconds to wait before the next check, backing off with jitter while idle"""
+        # Cap the exponent so a long idle streak can't overflow the float
+        upper = min(self.max_interval, self.min_interval * self.rate ** min(idle_index, 64))
+        return random.uniform(self.min_interval, max(self.min_interval, upper))
+
+    def _process_new_mentions(self, mentions):
+        """
+        Process the mentions that haven't been handled yet
+        
+        :param mentions: Mentions from the API or the filtered stream
+        :return: Number of new mentions
+        """
+        # Filter out already processed mentions
+        new_mentions = []
+        for mention in mentions:
+            if str(mention.id) not in self.processed_mentions:
+                new_mentions.append(mention)
+            else:
+                self.logger.debug("Skipping already processed mention %s", mention.id)
+        
+        self.logger.info("Found %s mentions, %s are new", len(mentions), len(new_mentions))
+        
+        # Only dispatch one mention per original tweet so concurrent
+        # workers don't translate and reply to the same tweet twice
+        batch = {}
+        original_ids = []
+        for mention in new_mentions:
+            original_id = self._extract_original_tweet_id(mention)
+            if original_id and original_id not in batch:
+                original_ids.append(original_id)
+            batch.setdefault(original_id or mention.id, mention)
+        
+        # Fetch all the original tweets in one lookup instead of one per mention
+        original_tweets = self.client.get_tweets(original_ids) if original_ids else {}
+        
+        # Process the new mentions concurrently
+        list(self.mention_pool.map(self.process_mention, batch.values(),
+                                   [original_tweets.get(tweet_id) for tweet_id in batch]))
+        
+        # Remember the newest mention so the next poll only asks for newer ones;
+        # saved only once the batch is handled, so a failure above can't skip mentions
+        if mentions:
+            newest_id = max(mention.id for mention in mentions)
+            if not self.last_processed_id or newest_id > self.last_processed_id:
+                self._save_last_processed_id(newest_id)
+        return len(new_mentions)
 
     def run(self):
         """Main bot loop"""
         self.logger.info("Starting Twitter bot...")
-        last_check_time = 0  # Initialize to 0 to check immediately
-        
-        while True:
+        if self.use_stream:
+            stream = self.client.start_mention_stream(self.mention_queue)
+            if stream:
+                self._run_stream(stream)
+                self.logger.warning("Mention stream stopped, falling back to polling")
+        self._run_polling()
+
+    def _run_stream(self, stream):
+        """Process mentions pushed by the filtered stream until the stream stops"""
+        self.logger.info("Receiving mentions from the filtered stream")
+        while not stream.failed.is_set():
             try:
-                current_time = time.time()
-                self.logger.info("Starting main loop iteration")
-                
                 # Process any pending tweets first
                 if self.pending_tweets:
-                    self.logger.info(f"Processing {len(self.pending_tweets)} pending tweets")
                     self.process_pending_tweets()
-                else:
-                    self.logger.info("No pending tweets to process")
                 
-                # Check for new mentions
-                self.logger.info("Checking for new mentions")
-                mentions = self.client.get_mentions(count=10)
+                # Wait for the next mention, waking up regularly for pending tweets
+                try:
+                    mentions = [self.mention_queue.get(timeout=self.min_interval)]
+                except queue.Empty:
+                    continue
+                
+                # Take everything else that arrived meanwhile as one batch
+                while True:
+                    try:
+                        mentions.append(self.mention_queue.get_nowait())
+                    except queue.Empty:
+                        break
                 
-                # Filter out already processed mentions
-                new_mentions = []
-                for mention in mentions:
-                    if str(mention.id) not in self.processed_mentions:
-                        new_mentions.append(mention)
-                    else:
-                        self.logger.info(f"Skipping already processed mention {mention.id}")
+                self._process_new_mentions(mentions)
                 
-                self.logger.info(f"Found {len(mentions)} mentions, {len(new_mentions)} are new")
+            except Exception as e:
+                self.logger.error("Error in stream loop: %s", e)
+                time.sleep(self.min_interval)
+
+    def _run_polling(self):
+        """Poll for new mentions"""
+        idle_index = 0  # Number of consecutive checks without new mentions
+        last_full_refresh = 0  # Initialize to 0 so the first check is a full one
+        
+        while True:
+            try:
+                self.logger.debug("Starting main loop iteration")
                 
-                # Process each new mention
-                for mention in new_mentions:
-                    self.process_mention(mention)
+                # Process any pending tweets first
+                if self.pending_tweets:
+                    self.process_pending_tweets()
+                else:
+                    self.logger.debug("No pending tweets to process")
                 
-                # Update last check time
-                last_check_time = current_time
+                # Check for new mentions, only asking for mentions newer than the
+                # last one seen unless a full refresh is due
+                self.logger.debug("Checking for new mentions")
+                since_id = self.last_processed_id
+                if time.time() - last_full_refresh >= self.full_refresh_interval:
+                    since_id = None
+                    last_full_refresh = time.time()
+                mentions = self.client.get_mentions(count=10, since_id=since_id)
+                new_count = self._process_new_mentions(mentions)
                 
-                # Wait before next check
-                self.logger.info("Waiting 60 seconds before next check")
-                time.sleep(60)
+                # Check again soon while mentions are arriving, back off while idle
+                idle_index = 0 if new_count else idle_index + 1
+                interval = self._next_interval(idle_index)
+                self.logger.debug("Waiting %.0f seconds before next check", interval)
+                time.sleep(interval)
                 
             except Exception as e:
-                self.logger.error(f"Error in main loop: {str(e)}")
-                time.sleep(60)  # Wait a minute before retrying
+                self.logger.error("Error in main loop: %s", e)
+                idle_index += 1
+                time.sleep(self._next_interval(idle_index))  # Back off before retrying
@@ -0,0 +1,102 @@
+# cache.py
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+def text_key(text):
+    """
+    Compact, fixed-size cache key for a piece of text
+
+    :param text: Text to hash
+    :return: 16-byte blake2b digest of the text
+    """
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+class LRUCache:
+    def __init__(self, maxsize=1024, backing=None):
+        """
+        Thread-safe mapping that evicts the least recently used entry
+        once it holds more than maxsize items
+
+        :param maxsize: Maximum number of entries kept
+        :param backing: Optional slower cache (e.g. DiskCache) consulted on a
+                        miss and written through on every store
+        """
+        self.maxsize = maxsize
+        self.backing = backing
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key (marking it as recently used) or default"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key]
+        if self.backing is None:
+            return default
+        value = self.backing.get(key)
+        if value is None:
+            return default
+        self._store(key, value)
+        return value
+
+    def __setitem__(self, key, value):
+        self._store(key, value)
+        if self.backing is not None:
+            self.backing[key] = value
+
+    def _store(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+class DiskCache:
+    def __init__(self, path, table, ttl=30 * 24 * 3600):
+        """
+        SQLite-backed cache of text values with a time to live, so results
+        survive restarts
+
+        :param path: Path of the database file
+        :param table: Table holding this cache's entries
+        :param ttl: Seconds an entry stays valid
+        """
+        self.table = table
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key BLOB PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL"
+            ")"
+        )
+        # Drop what expired while the bot was not running
+        self.db.execute(f"DELETE FROM {table} WHERE expires <= ?", (time.time(),))
+
+    def get(self, key, default=None):
+        """Return the stored value for key, or default if missing or expired"""
+        with self._lock:
+            row = self.db.execute(
+                f"SELECT value FROM {self.table} WHERE key = ? AND expires > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else default
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self.db.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl)
+            )
@@ -4,18 +4,37 @@ import re
 from dotenv import load_dotenv
 import logging
 
+# Allowed characters of the OAuth 1.0a secrets and tokens
+_TOKEN_RE = re.compile(r'^[a-zA-Z0-9_\-]+$')
+# Spaces and newlines pasted into credentials in .env files (never part of a key)
+_CREDENTIAL_DELETE = str.maketrans('', '', ' \n')
+# Characters a credential must not contain, and the error for each class of them
+_FORBIDDEN_CHARS = frozenset(' \n\t\r"\'')
+_FORBIDDEN_CHAR_CLASSES = (('spaces', ' '), ('newlines', '\n\r'), ('tabs', '\t'), ('quotes', '"\''))
+
+# Twitter API credentials required by get_twitter_credentials
+TWITTER_CREDENTIAL_VARS = (
+    'BEARER_TOKEN', 'CONSUMER_KEY', 'CONSUMER_SECRET',
+    'ACCESS_TOKEN', 'ACCESS_TOKEN_SECRET'
+)
+# Every environment variable the bot reads
+ENV_VARS = TWITTER_CREDENTIAL_VARS + (
+    'TRANSLATION_API_KEY', 'DETECT_API_KEY', 'S3_ACCESS_KEY', 'S3_SECRET_KEY'
+)
+
 class Config:
     def __init__(self):
-        # Load environment variables
+        # Load environment variables once; the getters read this snapshot
         load_dotenv()
+        self._env = {var: os.environ.get(var) for var in ENV_VARS}
+        self._twitter_credentials = None  # Validated on first use
 
     def _clean_credential(self, value):
         """Clean credential by removing spaces, newlines, and quotes"""
         if not value:
             return value
-        # Remove quotes, spaces, and newlines
-        cleaned = value.strip().replace(' ', '').replace('\n', '').strip('"\'')
-        return cleaned
+        # Remove spaces and newlines in one pass, then the whitespace and quotes around the value
+        return value.translate(_CREDENTIAL_DELETE).strip().strip('"\'')
 
     def _validate_credential_length(self, key, value):
         """Validate credential length"""
@@ -35,33 +54,29 @@ class Config:
         if not value:
             return
         
-        # Check for common issues
-        if ' ' in value:
-            raise ValueError(f"{key} contains spaces")
-        if '\n' in value:
-            raise ValueError(f"{key} contains newlines")
-        if '"' in value or "'" in value:
-            raise ValueError(f"{key} contains quotes")
+        # Check for common issues in a single scan, naming the offending class only on failure
+        if not _FORBIDDEN_CHARS.isdisjoint(value):
+            for description, chars in _FORBIDDEN_CHAR_CLASSES:
+                if any(char in value for char in chars):
+                    raise ValueError(f"{key} contains {description}")
         
         # Basic format validation
         if key == 'BEARER_TOKEN' and not value.startswith('AAAA'):
             raise ValueError(f"{key} should start with 'AAAA'")
-        if key == 'CONSUMER_KEY' and not re.match(r'^[a-zA-Z0-9]+$', value):
+        if key == 'CONSUMER_KEY' and not (value.isascii() and value.isalnum()):
             raise ValueError(f"{key} should contain only alphanumeric characters")
-        if key in ['CONSUMER_SECRET', 'ACCESS_TOKEN', 'ACCESS_TOKEN_SECRET'] and not re.match(r'^[a-zA-Z0-9_\-]+$', value):
+        if key in ['CONSUMER_SECRET', 'ACCESS_TOKEN', 'ACCESS_TOKEN_SECRET'] and not _TOKEN_RE.match(value):
             raise ValueError(f"{key} should contain only alphanumeric characters, underscores, and hyphens")
 
     def get_twitter_credentials(self):
         """Retrieve and validate Twitter API credentials"""
-        required_env_vars = [
-            'BEARER_TOKEN', 'CONSUMER_KEY', 'CONSUMER_SECRET',
-            'ACCESS_TOKEN', 'ACCESS_TOKEN_SECRET'
-        ]
+        if self._twitter_credentials is not None:
+            return dict(self._twitter_credentials)
         
         # Verify all required environment variables are present
         credentials = {}
-        for var in required_env_vars:
-            value = os.getenv(var)
+        for var in TWITTER_CREDENTIAL_VARS:
+            value = self._env[var]
             if not value:
                 raise ValueError(f"Missing required environment variable: {var}")
             
@@ -72,15 +87,16 @@ class Config:
             
             credentials[var] = cleaned_value
         
-        return credentials
+        self._twitter_credentials = credentials
+        return dict(credentials)
 
     def get_translation_api_key(self):
         """Retrieve translation API key"""
-        return os.getenv('TRANSLATION_API_KEY')
+        return self._env['TRANSLATION_API_KEY']
 
     def get_detect_api_key(self):
         """Retrieve language detection API key"""
-        api_key = os.getenv('DETECT_API_KEY')
+        api_key = self._env['DETECT_API_KEY']
         if api_key:
             api_key = api_key.strip()
             if not api_key:
@@ -94,8 +110,8 @@ class Config:
             
     def get_s3_credentials(self):
         """Retrieve S3/Archive.org credentials"""
-        access_key = os.getenv('S3_ACCESS_KEY')
-        secret_key = os.getenv('S3_SECRET_KEY')
+        access_key = self._env['S3_ACCESS_KEY']
+        secret_key = self._env['S3_SECRET_KEY']
         
         if not access_key or not secret_key:
             logging.warning("Missing S3 credentials in environment variables")
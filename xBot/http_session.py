@@ -0,0 +1,46 @@
+# http_session.py
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from retry import TRANSIENT_STATUS_CODES
+
+def create_session(pool_maxsize=10, retries=0, status_forcelist=TRANSIENT_STATUS_CODES):
+    """
+    Create a requests session that keeps connections alive between calls
+
+    :param pool_maxsize: Connections kept open per host (match the number of worker threads)
+    :param retries: Times a request is retried after a connection error or a
+                    response with a status in status_forcelist, with exponential
+                    backoff (0 for none). Only idempotent methods are retried.
+    :param status_forcelist: Response statuses worth retrying (429/5xx by default)
+    :return: requests.Session
+    """
+    session = requests.Session()
+    max_retries = 0
+    if retries:
+        # Hand the last response back once retries run out, so callers still
+        # see the status code rather than a RetryError
+        max_retries = Retry(total=retries, backoff_factor=0.5, status_forcelist=status_forcelist,
+                            raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_maxsize, max_retries=max_retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+class SessionRequests:
+    """
+    Stand-in for the requests module that sends get/post through a session,
+    for libraries that call requests.get/requests.post directly
+    """
+    def __init__(self, session):
+        self._session = session
+
+    def get(self, *args, **kwargs):
+        return self._session.get(*args, **kwargs)
+
+    def post(self, *args, **kwargs):
+        return self._session.post(*args, **kwargs)
+
+    def __getattr__(self, name):
+        # Exceptions and everything else come from the real module
+        return getattr(requests, name)
@@ -6,6 +6,9 @@ from config import Config
 
 def setup_logging():
     """Configure logging"""
+    # Leave an existing configuration alone (and don't open another log file)
+    if logging.getLogger().handlers:
+        return
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -31,7 +34,7 @@ def main():
         bot.run()
         
     except Exception as e:
-        logger.error(f"Error in main: {str(e)}")
+        logger.error("Error in main: %s", e)
         raise
 
 if __name__ == "__main__":
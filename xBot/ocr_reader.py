@@ -1,59 +1,347 @@
-import easyocr
-import matplotlib.pyplot as plt
+import cv2
 import numpy as np
-from PIL import Image
 from datetime import datetime
 import os
+import gc
 from translation_service import TranslationService
 import logging
-from langdetect import detect
 from dotenv import load_dotenv
-import requests
-import tempfile
+from http_session import create_session
+import threading
+import functools
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+# EasyOCR holds on to memory across readtext calls; collect every this many
+# calls so a long-running bot stays bounded
+GC_EVERY = 16
+# Images an OCR worker process handles before it's replaced with a fresh one
+WORKER_MAX_TASKS = 256
+
+# Languages the bot's OCRReader recognizes
+OCR_LANGUAGES = ['en', 'fr', 'es']
+
+# Environment variable with the number of worker processes for batches on
+# CPU, each with its own reader; unset, 0 or 1 keeps OCR in this process.
+# Read when an OCRReader is created, after Config has loaded .env.
+EASYOCR_WORKERS_VAR = 'EASYOCR_WORKERS'
+
+# Size every image is scaled to for batched recognition
+OCR_BATCH_WIDTH = 800
+OCR_BATCH_HEIGHT = 600
+
+# Longest side images are scaled down to before OCR; tweet-sized images are
+# left alone, larger ones only cost detection time
+MAX_IMAGE_SIDE = 1600
+
+# Images downloaded at the same time by extract_text_batch
+DOWNLOAD_WORKERS = 8
+# Seconds to wait for the image host before giving up on a download
+DOWNLOAD_TIMEOUT = 10
+
+# Images come from the same CDN host over and over; keep the connections
+# open and retry throttled or failed downloads
+_SESSION = create_session(pool_maxsize=DOWNLOAD_WORKERS, retries=3)
+
+# Loading an easyocr.Reader takes seconds, so one is kept per language list
+_readers = {}
+_readers_lock = threading.Lock()
+# The bot processes mentions from several threads; EasyOCR's models are not
+# safe to run concurrently, and the readers are shared
+_ocr_lock = threading.Lock()
+# readtext calls in this process, across every reader (guarded by _ocr_lock)
+_ocr_calls = 0
+# Language lists whose shared reader has run the warm-up batch (guarded by _ocr_lock)
+_warmed_up = set()
+
+@functools.lru_cache(maxsize=None)
+def _torch():
+    """
+    Import and configure torch on first use; together with easyocr it takes
+    seconds to load, which code paths that never OCR shouldn't pay
+    """
+    import torch
+    # OCR calls are serialized by _ocr_lock, so on CPU one call may use half the
+    # cores and leave the rest to the download, translation and bot threads
+    if not torch.cuda.is_available():
+        torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+    return torch
+
+def _reader_options():
+    """
+    easyocr.Reader arguments for this machine: the GPU with cuDNN autotuning
+    when there is one (batches use a fixed input size), otherwise the CPU
+    with the int8-quantized recognizer
+    """
+    gpu = _torch().cuda.is_available()
+    return {'gpu': gpu, 'quantize': not gpu, 'cudnn_benchmark': gpu}
+
+def _get_reader(languages):
+    """
+    Shared easyocr.Reader for a list of languages, loaded on first use
+    
+    :param languages: Language codes, in EasyOCR's order of preference
+    :return: easyocr.Reader
+    """
+    import easyocr
+    key = tuple(languages)
+    with _readers_lock:
+        reader = _readers.get(key)
+        if reader is None:
+            reader = easyocr.Reader(list(key), **_reader_options())
+            _readers[key] = reader
+        return reader
+
+def _collect_garbage():
+    """
+    Count a readtext call and free unreferenced tensors and cached GPU memory
+    every GC_EVERY calls; call with _ocr_lock held
+    """
+    global _ocr_calls
+    _ocr_calls += 1
+    if _ocr_calls % GC_EVERY:
+        return
+    gc.collect()
+    torch = _torch()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+def _downscale(image):
+    """
+    Shrink an image so its longest side is at most MAX_IMAGE_SIDE
+    
+    :param image: Image array
+    :return: (image, scale) where scale maps original to returned coordinates
+    """
+    height, width = image.shape[:2]
+    scale = min(1.0, MAX_IMAGE_SIDE / max(height, width))
+    if scale < 1.0:
+        image = cv2.resize(image, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    return image, scale
+
+_worker_reader = None  # Reader of an OCR worker process
+
+def _init_ocr_worker(languages):
+    """Load the reader once when an OCR worker process starts"""
+    global _worker_reader
+    import easyocr
+    # One thread per process, the pool already uses every core
+    _torch().set_num_threads(1)
+    _worker_reader = easyocr.Reader(languages, **_reader_options())
+
+def _ocr_worker(image):
+    """Recognize the text of one image in an OCR worker process"""
+    with _torch().inference_mode():
+        results = _worker_reader.readtext(image)
+    return " ".join([result[1] for result in results])
 
 class OCRReader:
-    def __init__(self, translator=None):
+    def __init__(self, translator=None, workers=None, languages=OCR_LANGUAGES):
+        """
+        :param translator: TranslationService used for language detection
+        :param workers: Worker processes used by extract_text_batch (0 or 1 for none);
+                        defaults to the EASYOCR_WORKERS environment variable
+        :param languages: Language codes the reader recognizes
+        """
         self.logger = logging.getLogger(__name__)
-        self.reader = easyocr.Reader(['en', 'fr', 'es'])
+        self.languages = list(languages)
+        self._reader = None  # Loaded on the first OCR call
+        self._reader_lock = _ocr_lock
+        if workers is None:
+            workers = int(os.getenv(EASYOCR_WORKERS_VAR, '0'))
+        self.workers = workers
+        self._pool = None  # Worker processes, started on the first batch
         self.translator = translator or TranslationService()
-        self.logger.info(f"OCRReader initialized with translator (API key present: {self.translator.detect_api_key is not None})")
+        self.logger.info("OCRReader initialized with translator (API key present: %s)", self.translator.detect_api_key is not None)
+
+    @property
+    def reader(self):
+        """The shared easyocr.Reader, loaded the first time OCR is needed"""
+        if self._reader is None:
+            self._reader = _get_reader(self.languages)
+        return self._reader
+
+    def _download_image(self, image_url):
+        """
+        Download and decode an image in memory
+        
+        :param image_url: URL of the image
+        :return: RGB image array, as EasyOCR decodes images itself
+        """
+        response = _SESSION.get(image_url, timeout=DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+        
+        image = cv2.imdecode(np.frombuffer(response.content, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f"Could not decode image from {image_url}")
+        image, _ = _downscale(image)
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
 
     def extract_text(self, image_url):
         """Extract text from an image URL"""
         try:
-            # Download image to temporary file
-            response = requests.get(image_url)
-            response.raise_for_status()
+            # Download and decode the image without touching the disk
+            image = self._download_image(image_url)
             
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as temp_file:
-                temp_file.write(response.content)
-                temp_path = temp_file.name
+            # Extract text using EasyOCR
+            with self._reader_lock, _torch().inference_mode():
+                results = self.reader.readtext(image)
+                _collect_garbage()
             
-            try:
-                # Extract text using EasyOCR
-                results = self.reader.readtext(temp_path)
-                
-                # Combine all text
-                text = " ".join([result[1] for result in results])
-                
-                # Detect language (but don't translate)
-                detected_lang = self.translator.detect_language(text)
-                self.logger.info(f"Detected language: {detected_lang}")
-                
-                # Return the original text without translation
-                return text
-                
-            finally:
-                # Clean up temporary file
-                try:
-                    os.unlink(temp_path)
-                except:
-                    pass
+            # Combine all text
+            text = " ".join([result[1] for result in results])
+            
+            # Detect language (but don't translate)
+            detected_lang = self.translator.detect_language(text)
+            self.logger.debug("Detected language: %s", detected_lang)
+            
+            # Return the original text without translation
+            return text
                     
         except Exception as e:
-            self.logger.error(f"Error extracting text from image: {str(e)}")
+            self.logger.error("Error extracting text from image: %s", e)
             return None
 
+    def extract_text_batch(self, image_urls):
+        """
+        Extract text from several image URLs in one batched EasyOCR pass
+        
+        :param image_urls: List of image URLs
+        :return: List with the text of each image, in the same order (None
+                 for images that could not be downloaded or read)
+        """
+        texts = [None] * len(image_urls)
+        images = {}
+        try:
+            # Downloads are network-bound, fetch them all at once
+            with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as pool:
+                downloads = [pool.submit(self._download_image, image_url) for image_url in image_urls]
+            for i, (image_url, download) in enumerate(zip(image_urls, downloads)):
+                try:
+                    images[i] = download.result()
+                except Exception as e:
+                    self.logger.error("Error downloading image %s: %s", image_url, e)
+            if not images:
+                return texts
+            
+            # On CPU, spread the images over worker processes
+            if self.workers > 1:
+                for i, text in zip(images, self._get_pool().map(_ocr_worker, images.values(), chunksize=1)):
+                    texts[i] = text
+                return texts
+            
+            # readtext_batched resizes every image to the same size so they
+            # can go through the models together
+            with self._reader_lock, _torch().inference_mode():
+                self._warm_up()
+                batch_results = self.reader.readtext_batched(
+                    list(images.values()),
+                    n_width=OCR_BATCH_WIDTH,
+                    n_height=OCR_BATCH_HEIGHT,
+                    batch_size=len(images)
+                )
+                _collect_garbage()
+            for i, results in zip(images, batch_results):
+                texts[i] = " ".join([result[1] for result in results])
+            return texts
+            
+        except Exception as e:
+            self.logger.error("Error extracting text from images: %s", e)
+            return texts
+
+    def extract_and_translate(self, image_path):
+        """
+        Extract the text fragments of an image file and translate them
+        
+        :param image_path: Path to the image file
+        :return: List of dicts with the original and translated text,
+                 language, confidence and bounding box of each fragment
+        """
+        try:
+            # Load the image, scaled down if oversized
+            image = cv2.imread(image_path)
+            if image is None:
+                raise ValueError(f"Could not read image {image_path}")
+            image, scale = _downscale(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+            
+            # Detect and recognize text
+            with self._reader_lock, _torch().inference_mode():
+                results = self.reader.readtext(image)
+                _collect_garbage()
+            
+            # Report bounding boxes in the original image's coordinates
+            if scale < 1.0:
+                results = [([[int(x / scale), int(y / scale)] for x, y in bbox], text, confidence)
+                           for bbox, text, confidence in results]
+            
+            # Detect language of the text
+            text = " ".join([result[1] for result in results])
+            detected_lang = self.translator.detect_language(text)
+            self.logger.debug("Detected language: %s", detected_lang)
+
+            # Only translate if language is detected and it's not English; all
+            # fragments of the image go out together
+            translations = [None] * len(results)
+            if detected_lang and detected_lang != 'en':
+                translations = self.translator.translate_batch([result[1] for result in results],
+                                                               source_language=detected_lang)
+
+            # Format results with translation
+            formatted_results = []
+            for (bbox, text, confidence), translated_text in zip(results, translations):
+                formatted_results.append({
+                    'original_text': text,
+                    'translated_text': translated_text,
+                    'source_language': detected_lang,
+                    'confidence': round(float(confidence), 3),
+                    'bbox': bbox
+                })
+                
+            return formatted_results
+        
+        except Exception as e:
+            self.logger.error("Error processing image: %s", e)
+            return []
+
+    def _get_pool(self):
+        """Worker process pool, each process holding its own reader"""
+        if self._pool is None:
+            # Spawned rather than forked, PyTorch's threads don't survive a fork
+            context = multiprocessing.get_context('spawn')
+            self._pool = context.Pool(self.workers, initializer=_init_ocr_worker, initargs=(self.languages,),
+                                      maxtasksperchild=WORKER_MAX_TASKS)
+            self.logger.info("Started %s OCR worker processes", self.workers)
+        return self._pool
+
+    def _warm_up(self):
+        """
+        Run a blank batch through the shared reader once, so the first real
+        batch doesn't pay for setup (under the reader lock)
+        """
+        key = tuple(self.languages)
+        if key in _warmed_up:
+            return
+        blank = np.zeros((OCR_BATCH_HEIGHT, OCR_BATCH_WIDTH, 3), np.uint8)
+        self.reader.readtext_batched([blank], n_width=OCR_BATCH_WIDTH, n_height=OCR_BATCH_HEIGHT)
+        _warmed_up.add(key)
+
+_default_translator = None
+
+def _get_default_translator():
+    """Translator used when callers don't provide one, configured from the environment once"""
+    global _default_translator
+    if _default_translator is None:
+        load_dotenv()
+        api_key = os.getenv("DETECT_API_KEY")
+        _default_translator = TranslationService(api_key)
+        logging.info("Created new translator with API key (present: %s)", api_key is not None)
+    return _default_translator
+
+@functools.lru_cache(maxsize=8)
+def _get_ocr_reader(languages, translator):
+    """OCRReader reused by extract_and_translate_text for a language tuple and translator"""
+    return OCRReader(translator=translator, languages=languages)
+
 def extract_and_translate_text(image_path, languages=['en'], translator=None):
     """
     Extract text from an image using EasyOCR and translate it
@@ -66,47 +354,9 @@ def extract_and_translate_text(image_path, languages=['en'], translator=None):
     Returns:
         list: List of dictionaries containing original and translated text
     """
-    try:
-        # Initialize the readers
-        reader = easyocr.Reader(languages)
-        
-        # Use provided translator or create new one
-        if translator is None:
-            # Only create a new translator if none provided
-            load_dotenv()
-            api_key = os.getenv("DETECT_API_KEY")
-            translator = TranslationService(api_key)
-            logging.info(f"Created new translator with API key (present: {api_key is not None})")
-        
-        # Detect and recognize text
-        results = reader.readtext(image_path)
-        
-        # Detect language of the text
-        text = " ".join([result[1] for result in results])
-        detected_lang = translator.detect_language(text)
-        logging.info(f"Detected language: {detected_lang}")
-
-        # Format results with translation
-        formatted_results = []
-        for bbox, text, confidence in results:
-            # Only translate if language is detected and it's not English
-            translated_text = None
-            if detected_lang and detected_lang != 'en':
-                translated_text = translator.translate_text(text, source_language=detected_lang)
-            
-            formatted_results.append({
-                'original_text': text,
-                'translated_text': translated_text,
-                'source_language': detected_lang,
-                'confidence': round(float(confidence), 3),
-                'bbox': bbox
-            })
-            
-        return formatted_results
-    
-    except Exception as e:
-        logging.error(f"Error processing image: {str(e)}")
-        return []
+    # Use provided translator or the shared default one
+    ocr = _get_ocr_reader(tuple(languages), translator or _get_default_translator())
+    return ocr.extract_and_translate(image_path)
 
 def save_to_documents(results, image_path, output_dir="extracted_texts"):
     """
@@ -126,78 +376,85 @@ def save_to_documents(results, image_path, output_dir="extracted_texts"):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         base_name = os.path.splitext(os.path.basename(image_path))[0]
         
-        # Save original text
+        date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        # Save original text, built in memory and written at once
         original_path = os.path.join(output_dir, f"{base_name}_{timestamp}_original.txt")
+        parts = [f"OCR Results for: {image_path}\n", f"Extraction Date: {date}\n", "-" * 50 + "\n\n"]
+        parts.extend(
+            f"{i}. Original Text: {result['original_text']}\n"
+            f"   Language: {result['source_language']}\n"
+            f"   Confidence: {result['confidence']:.3f}\n\n"
+            for i, result in enumerate(results, 1)
+        )
         with open(original_path, 'w', encoding='utf-8') as txt_file:
-            txt_file.write(f"OCR Results for: {image_path}\n")
-            txt_file.write(f"Extraction Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            txt_file.write("-" * 50 + "\n\n")
-            
-            for i, result in enumerate(results, 1):
-                txt_file.write(f"{i}. Original Text: {result['original_text']}\n")
-                txt_file.write(f"   Language: {result['source_language']}\n")
-                txt_file.write(f"   Confidence: {result['confidence']:.3f}\n\n")
+            txt_file.write(''.join(parts))
         
         # Save translated text
         translated_path = os.path.join(output_dir, f"{base_name}_{timestamp}_translated.txt")
+        parts = [f"Translation Results for: {image_path}\n", f"Translation Date: {date}\n", "-" * 50 + "\n\n"]
+        parts.extend(
+            f"{i}. Original ({result['source_language']}): {result['original_text']}\n"
+            f"   English: {result['translated_text'] or '[No translation needed or available]'}\n"
+            f"   Confidence: {result['confidence']:.3f}\n\n"
+            for i, result in enumerate(results, 1)
+        )
         with open(translated_path, 'w', encoding='utf-8') as txt_file:
-            txt_file.write(f"Translation Results for: {image_path}\n")
-            txt_file.write(f"Translation Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            txt_file.write("-" * 50 + "\n\n")
-            
-            for i, result in enumerate(results, 1):
-                txt_file.write(f"{i}. Original ({result['source_language']}): {result['original_text']}\n")
-                if result['translated_text']:
-                    txt_file.write(f"   English: {result['translated_text']}\n")
-                else:
-                    txt_file.write(f"   English: [No translation needed or available]\n")
-                txt_file.write(f"   Confidence: {result['confidence']:.3f}\n\n")
+            txt_file.write(''.join(parts))
         
-        print(f"\nFiles saved successfully:")
-        print(f"Original text: {original_path}")
-        print(f"Translated text: {translated_path}")
+        logging.info("Saved original text to %s and translated text to %s", original_path, translated_path)
         
         return original_path, translated_path
         
     except Exception as e:
-        print(f"Error saving documents: {str(e)}")
+        logging.error("Error saving documents: %s", e)
         return None, None
 
-def visualize_predictions(image_path, predictions):
+def visualize_predictions(image_path, predictions, output_path=None):
     """
     Visualize the OCR predictions on the image
+    
+    Args:
+        image_path (str): Path to the image file
+        predictions (list): Results from extract_and_translate_text
+        output_path (str, optional): Where to write the annotated image
+    
+    Returns:
+        numpy.ndarray: Annotated image (BGR), or None on error
     """
     try:
-        # Read image using PIL
-        image = Image.open(image_path)
+        image = cv2.imread(image_path)
+        if image is None:
+            raise ValueError(f"Could not read image {image_path}")
         
-        # Create figure
-        plt.figure(figsize=(10, 10))
-        plt.imshow(image)
+        # Nothing to draw without predictions; polylines rejects an empty list
+        if predictions:
+            # Draw every bounding box in one call
+            boxes = np.asarray([pred['bbox'] for pred in predictions], dtype=np.int32).reshape(-1, 4, 1, 2)
+            cv2.polylines(image, list(boxes), isClosed=True, color=(0, 0, 255), thickness=2)
         
-        for pred in predictions:
-            bbox = np.array(pred['bbox'])
-            text = pred['original_text']
-            
-            # Plot the bounding box
-            plt.plot([bbox[0][0], bbox[1][0], bbox[2][0], bbox[3][0], bbox[0][0]],
-                    [bbox[0][1], bbox[1][1], bbox[2][1], bbox[3][1], bbox[0][1]],
-                    'r-', linewidth=2)
-            
-            # Add text annotation
-            plt.text(bbox[0][0], bbox[0][1], 
-                    f"{text} ({pred['confidence']:.2f})",
-                    color='white', backgroundcolor='red',
-                    fontsize=8)
+            # First corner of every box as plain ints, pulled out in one slice
+            origins = boxes[:, 0, 0].tolist()
+            for pred, (x, y) in zip(predictions, origins):
+                # Add text annotation on a red background at the first corner
+                label = f"{pred['original_text']} ({pred['confidence']:.2f})"
+                (width, height), baseline = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.4, 1)
+                cv2.rectangle(image, (x, y - height - baseline), (x + width, y), (0, 0, 255), cv2.FILLED)
+                cv2.putText(image, label, (x, y - baseline), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
         
-        plt.axis('off')
-        plt.show()
+        if output_path:
+            cv2.imwrite(output_path, image)
+            logging.info("Saved annotated image to %s", output_path)
+        return image
         
     except Exception as e:
-        print(f"Error visualizing predictions: {str(e)}")
+        logging.error("Error visualizing predictions: %s", e)
+        return None
 
 # Example usage
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    
     # Replace with your image path
     image_path = "./images/test3.jpeg"
     
@@ -218,4 +475,5 @@ if __name__ == "__main__":
     original_path, translated_path = save_to_documents(results, image_path)
     
     # Visualize results
-    visualize_predictions(image_path, results)
\ No newline at end of file
+    base_name = os.path.splitext(os.path.basename(image_path))[0]
+    visualize_predictions(image_path, results, os.path.join("extracted_texts", f"{base_name}_annotated.jpg"))
\ No newline at end of file
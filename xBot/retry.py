@@ -0,0 +1,86 @@
+# retry.py
+import time
+import random
+import logging
+import functools
+import threading
+import requests
+
+# Responses that mean "try again later" rather than "this request is wrong"
+TRANSIENT_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+def is_transient_error(error):
+    """
+    Check whether an exception looks like throttling or a temporary outage
+
+    :param error: Exception raised by an API call
+    :return: True if the call is worth retrying
+    """
+    if isinstance(error, (requests.Timeout, requests.ConnectionError, TimeoutError)):
+        return True
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) in TRANSIENT_STATUS_CODES:
+        return True
+    # deep_translator reports throttling as its own exception types
+    message = str(error).lower()
+    return any(marker in message for marker in ('too many requests', 'rate limit', 'quota'))
+
+class RateLimiter:
+    """
+    Token bucket shared by every caller of an API: allows bursts of up to
+    burst calls, then paces calls to rate per second
+    """
+    def __init__(self, rate, burst=1):
+        """
+        :param rate: Calls per second sustained over time
+        :param burst: Calls allowed back to back after an idle period
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, sleeping until one is available"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now, callers queue up behind each other
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0
+        if delay:
+            time.sleep(delay)
+
+def retry_with_backoff(max_attempts=3, base=2.0, max_concurrent=None, rate_limiter=None):
+    """
+    Decorator that retries transient failures with exponential backoff
+
+    :param max_attempts: Calls made before the last error is raised
+    :param base: Retry n waits base ** n seconds, plus up to a second of jitter
+    :param max_concurrent: Cap on calls in flight at the same time (None for no cap)
+    :param rate_limiter: Optional RateLimiter every attempt waits on
+    """
+    def decorator(func):
+        logger = logging.getLogger(func.__module__)
+        semaphore = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(max_attempts):
+                if rate_limiter is not None:
+                    rate_limiter.acquire()
+                try:
+                    if semaphore is None:
+                        return func(*args, **kwargs)
+                    with semaphore:
+                        return func(*args, **kwargs)
+                except Exception as e:
+                    if attempt == max_attempts - 1 or not is_transient_error(e):
+                        raise
+                    delay = base ** attempt + random.uniform(0, 1)
+                    logger.warning("%s failed (%s), retrying in %.1fs", func.__name__, e, delay)
+                    time.sleep(delay)
+        return wrapper
+    return decorator
@@ -0,0 +1,114 @@
+# state_store.py
+import os
+import sqlite3
+import logging
+import threading
+
+class StateStore:
+    def __init__(self, path="bot_state.db"):
+        """
+        SQLite-backed store for the IDs the bot has seen, grouped by kind
+        (processed mentions, downloaded tweets, pending tweets, accounts)
+
+        :param path: Path of the database file
+        """
+        self.logger = logging.getLogger(__name__)
+        # One connection shared by the bot's worker threads, serialized by the lock
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            "kind TEXT NOT NULL, id TEXT NOT NULL, PRIMARY KEY (kind, id)"
+            ") WITHOUT ROWID"
+        )
+
+    def contains(self, kind, item_id):
+        """Check whether an ID is stored under kind"""
+        with self._lock:
+            row = self.db.execute(
+                "SELECT 1 FROM state WHERE kind = ? AND id = ? LIMIT 1", (kind, str(item_id))
+            ).fetchone()
+        return row is not None
+
+    def add(self, kind, item_id):
+        """
+        Store an ID under kind
+
+        :return: True if the ID was new, False if it was already stored
+        """
+        with self._lock:
+            cursor = self.db.execute(
+                "INSERT OR IGNORE INTO state (kind, id) VALUES (?, ?)", (kind, str(item_id))
+            )
+        return cursor.rowcount == 1
+
+    def remove(self, kind, item_id):
+        """Remove an ID from kind, if present"""
+        with self._lock:
+            self.db.execute("DELETE FROM state WHERE kind = ? AND id = ?", (kind, str(item_id)))
+
+    def ids(self, kind):
+        """List the IDs stored under kind"""
+        with self._lock:
+            return [row[0] for row in self.db.execute("SELECT id FROM state WHERE kind = ?", (kind,))]
+
+    def count(self, kind):
+        """Number of IDs stored under kind"""
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM state WHERE kind = ?", (kind,)).fetchone()[0]
+
+    def import_file(self, kind, path):
+        """
+        Import IDs from a legacy one-ID-per-line text file, then rename the
+        file so it is only imported once. Lines starting with "-" remove an
+        ID again (tombstones of the old pending-tweets log).
+
+        :param kind: Kind the IDs are stored under
+        :param path: Path of the text file
+        """
+        if not os.path.exists(path):
+            return
+        with self._lock, open(path, 'r') as f:
+            self.db.execute("BEGIN")
+            try:
+                for line in f:
+                    line = line.strip()
+                    if line.startswith('-'):
+                        self.db.execute("DELETE FROM state WHERE kind = ? AND id = ?", (kind, line[1:]))
+                    elif line:
+                        self.db.execute("INSERT OR IGNORE INTO state (kind, id) VALUES (?, ?)", (kind, line))
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+        os.replace(path, f"{path}.imported")
+        self.logger.info("Imported %s into the state database", path)
+
+    def view(self, kind):
+        """Set-like view of the IDs stored under kind"""
+        return StateSet(self, kind)
+
+class StateSet:
+    """Set-like view of one kind of ID in a StateStore; lookups go to the database"""
+    def __init__(self, store, kind):
+        self.store = store
+        self.kind = kind
+
+    def __contains__(self, item_id):
+        return self.store.contains(self.kind, item_id)
+
+    def add(self, item_id):
+        """Add an ID, returning True if it was new"""
+        return self.store.add(self.kind, item_id)
+
+    def discard(self, item_id):
+        """Remove an ID if present"""
+        self.store.remove(self.kind, item_id)
+
+    def __iter__(self):
+        return iter(self.store.ids(self.kind))
+
+    def __len__(self):
+        return self.store.count(self.kind)
@@ -13,6 +13,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def log_tweepy_error(e):
+    """Log the structured error details carried by a tweepy exception"""
+    for err in getattr(e, 'api_errors', None) or []:
+        logger.error(f"Error {err.get('code')}: {err.get('message') or err.get('detail')}")
+    status_code = getattr(getattr(e, 'response', None), 'status_code', None)
+    if status_code in (401, 403):
+        logger.error(f"Credentials rejected (status {status_code})")
+    elif status_code == 429:
+        logger.error("Rate limit exceeded (status 429)")
+    elif status_code is not None:
+        logger.error(f"Response status code: {status_code}")
+
 def test_twitter_credentials():
     """Test Twitter API credentials"""
     try:
@@ -51,9 +63,7 @@ def test_twitter_credentials():
                 logger.info(f"Successfully authenticated with API v1.1 as @{user.screen_name}")
             except Exception as e:
                 logger.error(f"API v1.1 authentication failed: {str(e)}")
-                if hasattr(e, 'response') and e.response is not None:
-                    logger.error(f"Response status code: {e.response.status_code}")
-                    logger.error(f"Response text: {e.response.text}")
+                log_tweepy_error(e)
             
             # Test API v2
             try:
@@ -68,9 +78,7 @@ def test_twitter_credentials():
                 logger.info(f"Successfully authenticated with API v2 as @{user.data.username}")
             except Exception as e:
                 logger.error(f"API v2 authentication failed: {str(e)}")
-                if hasattr(e, 'response') and e.response is not None:
-                    logger.error(f"Response status code: {e.response.status_code}")
-                    logger.error(f"Response text: {e.response.text}")
+                log_tweepy_error(e)
             
             return True
             
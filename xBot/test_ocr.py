@@ -1,7 +1,9 @@
 # test_ocr.py
 import os
+import atexit
 import logging
 import tempfile
+import functools
 import requests
 from dotenv import load_dotenv
 from ocr_reader import OCRReader
@@ -15,29 +17,46 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def create_test_image(text="Bonjour le monde!", language="fr"):
-    """Create a test image with text in the specified language"""
-    # Create a blank image
-    img = Image.new('RGB', (400, 200), color=(255, 255, 255))
-    d = ImageDraw.Draw(img)
-    
+@functools.lru_cache(maxsize=1)
+def _load_font():
+    """Load the font for test images once"""
     # Try to use a default font
     try:
-        font = ImageFont.truetype("arial.ttf", 20)
+        return ImageFont.truetype("arial.ttf", 20)
     except:
         # If font not found, use default
-        font = ImageFont.load_default()
+        return ImageFont.load_default()
+
+@functools.lru_cache(maxsize=8)
+def create_test_image(text="Bonjour le monde!", language="fr"):
+    """
+    Create a test image with text in the specified language. The image is
+    only drawn once per text and language; later calls return the same
+    file, which is deleted when the process exits.
+    """
+    # Create a blank image
+    img = Image.new('RGB', (400, 200), color=(255, 255, 255))
+    d = ImageDraw.Draw(img)
     
     # Add text to the image
-    d.text((10, 10), text, fill=(0, 0, 0), font=font)
+    d.text((10, 10), text, fill=(0, 0, 0), font=_load_font())
     
     # Save to temp file
     with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as temp_file:
         img.save(temp_file, format='PNG')
         temp_path = temp_file.name
+    atexit.register(_remove_test_image, temp_path)
         
     return temp_path
 
+def _remove_test_image(path):
+    """Delete a test image created by create_test_image"""
+    try:
+        os.unlink(path)
+        logger.info(f"Deleted test image: {path}")
+    except OSError:
+        pass
+
 def test_ocr_without_translation():
     """Test OCR extraction without auto-translation"""
     # Load environment variables
@@ -89,13 +108,6 @@ def test_ocr_without_translation():
     except Exception as e:
         logger.error(f"Error in OCR test: {str(e)}")
         return False
-    finally:
-        # Clean up test image
-        try:
-            os.unlink(test_image_path)
-            logger.info(f"Deleted test image: {test_image_path}")
-        except:
-            pass
 
 if __name__ == "__main__":
     test_result = test_ocr_without_translation()
@@ -0,0 +1,98 @@
+# test_retry.py
+import logging
+from unittest import mock
+import requests
+import retry
+from retry import RateLimiter, retry_with_backoff
+from test_support import run_tests
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class FakeClock:
+    """Stands in for the time module in retry: sleeping just moves the clock forward"""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def test_retries_only_transient_errors():
+    """Timeouts are retried with backoff, other errors are raised right away"""
+    clock = FakeClock()
+    calls = []
+
+    @retry_with_backoff(max_attempts=3, base=2.0)
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise requests.Timeout("timed out")
+        return "ok"
+
+    @retry_with_backoff(max_attempts=3)
+    def broken():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with mock.patch.object(retry, 'time', clock):
+        assert flaky() == "ok"
+        assert len(calls) == 3
+        # Retry n waits base ** n plus up to a second of jitter
+        assert len(clock.sleeps) == 2
+        assert 1 <= clock.sleeps[0] <= 2 and 2 <= clock.sleeps[1] <= 3, clock.sleeps
+
+        calls.clear()
+        clock.sleeps.clear()
+        try:
+            broken()
+            assert False, "ValueError was not raised"
+        except ValueError:
+            pass
+        assert len(calls) == 1 and not clock.sleeps
+
+def test_gives_up_after_max_attempts():
+    """The last transient error is raised once max_attempts calls have failed"""
+    clock = FakeClock()
+    calls = []
+
+    @retry_with_backoff(max_attempts=2)
+    def down():
+        calls.append(1)
+        raise requests.ConnectionError("connection refused")
+
+    with mock.patch.object(retry, 'time', clock):
+        try:
+            down()
+            assert False, "ConnectionError was not raised"
+        except requests.ConnectionError:
+            pass
+    assert len(calls) == 2 and len(clock.sleeps) == 1
+
+def test_rate_limiter_delay():
+    """The bucket allows a burst, then spaces calls 1/rate seconds apart"""
+    clock = FakeClock()
+    with mock.patch.object(retry, 'time', clock):
+        limiter = RateLimiter(rate=2, burst=2)
+        for _ in range(4):
+            limiter.acquire()
+        # Two calls from the burst, then one every half second
+        assert clock.sleeps == [0.5, 0.5], clock.sleeps
+
+        # An idle period refills the bucket, but never beyond burst
+        clock.now += 10
+        clock.sleeps.clear()
+        for _ in range(3):
+            limiter.acquire()
+        assert clock.sleeps == [0.5], clock.sleeps
+
+if __name__ == "__main__":
+    run_tests(test_retries_only_transient_errors, test_gives_up_after_max_attempts, test_rate_limiter_delay)
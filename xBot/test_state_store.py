@@ -0,0 +1,51 @@
+# test_state_store.py
+import logging
+import os
+import tempfile
+from state_store import StateStore
+from test_support import run_tests
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def test_add_remove_contains():
+    """IDs can be added, looked up as str or int, and removed"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = StateStore(os.path.join(tmp, "state.db"))
+        pending = store.view("pending")
+
+        assert pending.add(123) is True
+        assert pending.add("123") is False  # Already stored, whatever the ID type
+        assert 123 in pending and "123" in pending
+        assert "123" not in store.view("mention")  # Kinds are kept apart
+        assert len(pending) == 1
+
+        pending.discard(123)
+        assert 123 not in pending
+        assert len(pending) == 0
+        store.db.close()
+
+def test_import_legacy_file():
+    """A legacy text file is imported once, with "-" lines removing IDs again"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = StateStore(os.path.join(tmp, "state.db"))
+        legacy_file = os.path.join(tmp, "pending_tweets.txt")
+        with open(legacy_file, 'w') as f:
+            f.write("111\n222\n\n-111\n333\n")
+
+        store.import_file("pending", legacy_file)
+        assert sorted(store.ids("pending")) == ["222", "333"]
+        assert not os.path.exists(legacy_file)
+        assert os.path.exists(f"{legacy_file}.imported")
+
+        # Nothing left to import on the next start
+        store.import_file("pending", legacy_file)
+        assert store.count("pending") == 2
+        store.db.close()
+
+if __name__ == "__main__":
+    run_tests(test_add_remove_contains, test_import_legacy_file)
@@ -0,0 +1,25 @@
+# test_support.py
+import logging
+
+logger = logging.getLogger(__name__)
+
+def run_tests(*tests):
+    """
+    Run offline test functions outside pytest, logging the result of each
+
+    :param tests: Test functions, which fail by raising AssertionError
+    :return: True if every test passed
+    """
+    passed = True
+    for test in tests:
+        try:
+            test()
+            logger.info(f"{test.__name__}: Success")
+        except AssertionError as e:
+            logger.error(f"{test.__name__} failed: {e}")
+            passed = False
+    if passed:
+        logger.info("All tests passed!")
+    else:
+        logger.error("Some tests failed. Please check the logs above for details.")
+    return passed
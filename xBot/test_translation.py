@@ -1,8 +1,12 @@
 import os
 import logging
+import tempfile
+from unittest import mock
 from dotenv import load_dotenv
-from translation_service import TranslationService
+import translation_service
+from translation_service import TranslationService, BATCH_SEPARATOR
 from config import Config
+from test_support import run_tests
 
 # Set up logging
 logging.basicConfig(
@@ -47,5 +51,61 @@ def test_translation():
     except Exception as e:
         logger.error(f"Error in test_translation: {str(e)}")
 
+def test_translate_batch_one_request():
+    """Fragments that come back line for line are translated with one request"""
+    requests_made = []
+    def fake_translate(text, source_language):
+        requests_made.append(text)
+        return BATCH_SEPARATOR.join(f"en:{line}" for line in text.split(BATCH_SEPARATOR))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with mock.patch.object(translation_service, 'TRANSLATION_CACHE_DB', os.path.join(tmp, "cache.db")):
+            translator = TranslationService()
+        translator.translate_text = fake_translate
+
+        translations = translator.translate_batch(["uno", "dos", "uno", " "], "es")
+        assert translations == ["en:uno", "en:dos", "en:uno", " "], translations
+        assert len(requests_made) == 1, requests_made
+
+        # Both fragments are cached now, nothing is requested again
+        assert translator.translate_batch(["dos", "uno"], "es") == ["en:dos", "en:uno"]
+        assert len(requests_made) == 1, requests_made
+
+def test_translate_batch_line_mismatch():
+    """A batch whose lines got merged falls back to one request per text"""
+    requests_made = []
+    def fake_translate(text, source_language):
+        requests_made.append(text)
+        # Merge the lines of a batch, as the translator does with short fragments
+        return "en:" + text.replace(BATCH_SEPARATOR, " ")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with mock.patch.object(translation_service, 'TRANSLATION_CACHE_DB', os.path.join(tmp, "cache.db")):
+            translator = TranslationService()
+        translator.translate_text = fake_translate
+
+        translations = translator.translate_batch(["uno", "dos", "tres"], "es")
+        assert translations == ["en:uno", "en:dos", "en:tres"], translations
+        # The batch request, then one for each text
+        assert requests_made == ["uno\ndos\ntres", "uno", "dos", "tres"], requests_made
+
+def test_translate_batch_failed_request():
+    """A failed batch request marks its texts as failed instead of retrying each one"""
+    requests_made = []
+    def fake_translate(text, source_language):
+        requests_made.append(text)
+        return None  # translate_text's result once the request has failed for good
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with mock.patch.object(translation_service, 'TRANSLATION_CACHE_DB', os.path.join(tmp, "cache.db")):
+            translator = TranslationService()
+        translator.translate_text = fake_translate
+
+        translations = translator.translate_batch(["uno", "dos", " "], "es")
+        assert translations == [None, None, " "], translations
+        assert requests_made == ["uno\ndos"], requests_made
+
 if __name__ == "__main__":
-    test_translation() 
\ No newline at end of file
+    test_translation()
+    run_tests(test_translate_batch_one_request, test_translate_batch_line_mismatch,
+              test_translate_batch_failed_request)
\ No newline at end of file
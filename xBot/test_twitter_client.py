@@ -1,7 +1,12 @@
 # test_twitter_client.py
 import logging
+from types import SimpleNamespace
+from unittest import mock
+import requests
 from dotenv import load_dotenv
+import twitter_client
 from twitter_client import TwitterClient
+from test_support import run_tests
 
 # Set up logging
 logging.basicConfig(
@@ -40,7 +45,76 @@ def test_post_reply():
         logger.error("Failed to post test reply")
         return False
 
+class FakeTweepyClient:
+    """Stands in for RateLimitedClient: answers lookups with canned tweets and media, counting the calls"""
+    def __init__(self, tweets=(), media=(), error=None):
+        self.tweets = list(tweets)
+        self.media = list(media)
+        self.error = error
+        self.calls = []
+
+    def __call__(self, **credentials):
+        # TwitterClient constructs its client from the credentials
+        return self
+
+    def get_me(self):
+        return SimpleNamespace(data=SimpleNamespace(id=42, username="test_bot"))
+
+    def get_tweets(self, ids, **kwargs):
+        self.calls.append(list(ids))
+        if self.error:
+            raise self.error
+        wanted = {str(tweet_id) for tweet_id in ids}
+        return SimpleNamespace(data=[tweet for tweet in self.tweets if str(tweet.id) in wanted],
+                               includes={'media': self.media})
+
+FAKE_CREDENTIALS = dict.fromkeys(
+    ('BEARER_TOKEN', 'CONSUMER_KEY', 'CONSUMER_SECRET', 'ACCESS_TOKEN', 'ACCESS_TOKEN_SECRET'), 'test'
+)
+
+def test_media_urls_by_media_key():
+    """Media are matched to their tweets by media key, whatever the ID type"""
+    fake = FakeTweepyClient(
+        tweets=[
+            SimpleNamespace(id=1, attachments={'media_keys': ['3_b']}),
+            SimpleNamespace(id=2, attachments={'media_keys': ['7_v']}),
+            SimpleNamespace(id=3, attachments=None),
+        ],
+        media=[
+            SimpleNamespace(media_key='7_v', type='video', variants=[
+                {'content_type': 'video/mp4', 'bitrate': 256000, 'url': 'https://video.example/low.mp4'},
+                {'content_type': 'video/mp4', 'bitrate': 832000, 'url': 'https://video.example/high.mp4'},
+                {'content_type': 'application/x-mpegURL', 'url': 'https://video.example/list.m3u8'},
+            ]),
+            SimpleNamespace(media_key='3_b', type='photo', url='https://img.example/b.jpg'),
+        ],
+    )
+    with mock.patch.object(twitter_client, 'RateLimitedClient', fake):
+        client = TwitterClient(credentials=FAKE_CREDENTIALS)
+
+    # Keyed by the IDs as passed, str here while the API returns int IDs
+    media_urls = client.get_media_urls(['1', '2', '3'])
+    assert media_urls == {'1': 'https://img.example/b.jpg',
+                          '2': 'https://video.example/high.mp4',
+                          '3': None}, media_urls
+    assert fake.calls == [['1', '2', '3']], fake.calls
+
+    # Cached under str IDs, so int lookups are answered without a request
+    assert client.get_media_url(1) == 'https://img.example/b.jpg'
+    assert client.get_cached_media_url(2) == 'https://video.example/high.mp4'
+    assert client.get_media_urls([1, 2]) == {1: 'https://img.example/b.jpg',
+                                             2: 'https://video.example/high.mp4'}
+    assert len(fake.calls) == 1, fake.calls
+
+def test_media_urls_connection_error():
+    """A batch that fails to connect comes back empty instead of raising"""
+    fake = FakeTweepyClient(error=requests.ConnectionError("connection reset"))
+    with mock.patch.object(twitter_client, 'RateLimitedClient', fake):
+        client = TwitterClient(credentials=FAKE_CREDENTIALS)
+    assert client.get_media_urls([1, 2]) == {1: None, 2: None}
+
 if __name__ == "__main__":
     print("Starting Twitter client test...")
     test_result = test_post_reply()
-    print(f"Test result: {'SUCCESS' if test_result else 'FAILED'}") 
\ No newline at end of file
+    print(f"Test result: {'SUCCESS' if test_result else 'FAILED'}")
+    run_tests(test_media_urls_by_media_key, test_media_urls_connection_error) 
\ No newline at end of file
@@ -1,7 +1,118 @@
 # translation_service.py
 from deep_translator import GoogleTranslator, single_detection
+from deep_translator.exceptions import LanguageNotSupportedException
+import deep_translator.google
+import deep_translator.detection
+from langdetect import DetectorFactory
+from langdetect.detector_factory import PROFILES_DIRECTORY
+from langdetect.lang_detect_exception import LangDetectException
+import os
 import logging
-from tweet_processor import TweetProcessor
+import functools
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from tweet_processor import TweetProcessor, TWEET_MAX_LENGTH
+from cache import LRUCache, DiskCache, text_key
+from http_session import create_session, SessionRequests
+from retry import RateLimiter, retry_with_backoff
+
+__all__ = ['TranslationService']
+
+# langdetect is randomized; a fixed seed gives the same answer for the same text
+DetectorFactory.seed = 0
+
+# deep_translator calls requests.get/requests.post directly, opening a new
+# connection (and TLS handshake) per call; route them through one pooled session.
+# The session retries dropped connections and 429/5xx replies itself, so a
+# blip costs a short wait instead of a full retry_with_backoff round.
+_SESSION = create_session(pool_maxsize=10, retries=2)
+deep_translator.google.requests = SessionRequests(_SESSION)
+deep_translator.detection.requests = SessionRequests(_SESSION)
+
+# Repost layout: language indicator followed by the translation
+REPOST_TEMPLATE = "({language} → en):\n\n{text}"
+# Characters left for the translation after a two-letter language indicator
+REPOST_TEXT_BUDGET = TWEET_MAX_LENGTH - len(REPOST_TEMPLATE.format(language='xx', text=''))
+# Source characters worth translating for a repost; English is rarely under
+# half the length of the source, anything beyond this would be cut anyway
+REPOST_SOURCE_LIMIT = 2 * REPOST_TEXT_BUDGET
+
+# Function words that are English and not also common words in other Latin
+# script languages ('a', 'in', 'is', 'was', 'will', 'of', 'to'... are left out,
+# they are just as common in Italian, Spanish, German or Dutch tweets). They
+# are also left out of the text sent to the detection API.
+EN_STOPWORDS = frozenset({
+    'the', 'and', 'with', 'that', 'this', 'have', 'were', 'you', 'your', 'what',
+    'from', 'they', 'are', 'would', 'been', 'which', 'their', 'there', 'about',
+    'should', 'could', 'because', 'when', 'who', 'our', 'just', 'its', 'than'
+})
+# An ASCII text counts as English without asking langdetect or the API when
+# at least this many of its words are English stopwords, and at least this share
+EN_MIN_STOPWORDS = 2
+EN_MIN_STOPWORD_SHARE = 0.25
+
+# Share of non-ASCII characters (emoji, curly quotes, dashes) an otherwise
+# ASCII text may have and still be checked for English stopwords
+MAX_NON_ASCII_RATIO = 0.05
+
+# Scripts used by a single language (Unicode character name prefix -> code).
+# Shared scripts such as Latin, Cyrillic or Arabic still go to the API.
+SCRIPT_LANGUAGES = (
+    ('HIRAGANA', 'ja'),
+    ('KATAKANA', 'ja'),
+    ('HANGUL', 'ko'),
+    ('CJK', 'zh'),
+    ('GREEK', 'el'),
+    ('HEBREW', 'he'),
+    ('THAI', 'th'),
+)
+
+# Languages langdetect is loaded with; fewer profiles load faster and use
+# less memory than all 55. Other languages come out with low confidence
+# and go to the detection API.
+LANGDETECT_PROFILES = (
+    'en', 'es', 'ar', 'fr', 'de', 'it', 'pt', 'ru', 'ja', 'ko',
+    'zh-cn', 'zh-tw', 'hi', 'bn', 'id', 'nl', 'tr', 'pl'
+)
+# Below this probability langdetect's answer is left to the detection API
+LANGDETECT_MIN_CONFIDENCE = 0.85
+
+# Longest text deep_translator accepts in one request
+TRANSLATE_MAX_CHARS = 5000
+# Joins short texts into one translation request; Google Translate keeps line
+# breaks, so the translation splits back into the same texts
+BATCH_SEPARATOR = '\n'
+
+# Requests to the translation and detection APIs in flight at the same time
+API_CONCURRENCY = 4
+# Sustained requests per second to each API, shared by all instances; both
+# throttle bursts (the detection API's free plan in particular)
+TRANSLATE_RATE_LIMITER = RateLimiter(rate=5, burst=10)
+DETECT_RATE_LIMITER = RateLimiter(rate=1, burst=5)
+
+# Detections and translations are kept across restarts in this database
+TRANSLATION_CACHE_DB = "translation_cache.db"
+
+@functools.lru_cache(maxsize=None)
+def _langdetect_factory():
+    """langdetect detector factory with only LANGDETECT_PROFILES loaded, built on first use"""
+    profiles = []
+    for language in LANGDETECT_PROFILES:
+        with open(os.path.join(PROFILES_DIRECTORY, language), encoding='utf-8') as f:
+            profiles.append(f.read())
+    factory = DetectorFactory()
+    factory.load_json_profile(profiles)
+    return factory
+
+def _is_mostly_ascii(text):
+    """
+    Check whether text is ASCII apart from a few symbols. Any non-ASCII letter
+    (an accented Latin letter or another script) rules it out, since English
+    tweets don't have them and most other languages do.
+    """
+    non_ascii = [char for char in text if not char.isascii()]
+    return len(non_ascii) <= MAX_NON_ASCII_RATIO * len(text) and not any(char.isalpha() for char in non_ascii)
 
 class TranslationService:
     def __init__(self, detect_api_key=None):
@@ -11,29 +122,32 @@ class TranslationService:
         :param detect_api_key: API key for language detection
         """
         self.logger = logging.getLogger(__name__)
-        self.translator = GoogleTranslator(target='en')
+        # GoogleTranslator keeps the text and languages of a request on the
+        # instance, so each worker thread gets its own, one per source language
+        self._local = threading.local()
+        
+        # Repeated texts (retweets, recurring headlines) skip the remote calls;
+        # hot entries stay in memory, everything else is read from disk
+        self._detection_cache = LRUCache(
+            maxsize=1024, backing=DiskCache(TRANSLATION_CACHE_DB, "detections")
+        )  # text hash -> language code
+        self._translation_cache = LRUCache(
+            maxsize=1024, backing=DiskCache(TRANSLATION_CACHE_DB, "translations")
+        )  # text hash + language -> translation
         
-        # Log initial API key state
-        self.logger.info(f"TranslationService initialization - API key provided: {detect_api_key is not None}")
-        if detect_api_key:
-            self.logger.info(f"Initial API key length: {len(detect_api_key)}")
+        # Runs the requests of translate_texts side by side
+        self._pool = ThreadPoolExecutor(max_workers=API_CONCURRENCY)
         
         # Validate and store API key
-        if detect_api_key:
-            # Clean the API key
-            detect_api_key = detect_api_key.strip()
-            if not detect_api_key:
-                self.logger.warning("Empty API key provided after stripping")
-                self.detect_api_key = None
-            else:
-                self.detect_api_key = detect_api_key
-                self.logger.info(f"TranslationService initialized with valid API key (length: {len(detect_api_key)})")
-        else:
-            self.logger.warning("No API key provided for language detection")
+        self.detect_api_key = detect_api_key.strip() if detect_api_key else None
+        if detect_api_key and not self.detect_api_key:
+            self.logger.warning("Empty API key provided after stripping")
             self.detect_api_key = None
-            
-        # Log final API key state
-        self.logger.info(f"Final API key state - Present: {self.detect_api_key is not None}, Length: {len(self.detect_api_key) if self.detect_api_key else 0}")
+        elif not detect_api_key:
+            self.logger.warning("No API key provided for language detection")
+        else:
+            self.logger.info("TranslationService initialized with detection API key (length: %s)",
+                             len(self.detect_api_key))
 
     def detect_language(self, text):
         """
@@ -43,20 +157,35 @@ class TranslationService:
         :return: Detected language code
         """
         try:
-            # Log API key state at start of detection
-            self.logger.info(f"Starting language detection - API key present: {self.detect_api_key is not None}, Length: {len(self.detect_api_key) if self.detect_api_key else 0}")
-            
             # Clean the text before language detection
             cleaned_text = TweetProcessor.clean_tweet_text(text)
             
-            # Skip first 10 words to avoid common English words at the start
-            words = cleaned_text.split()
-            if len(words) > 10:
-                cleaned_text = ' '.join(words[10:])
+            # Key on the cleaned text so the same tweet with different
+            # (shortened) URLs or spacing is answered from the cache
+            key = text_key(cleaned_text)
+            cached_lang = self._detection_cache.get(key)
+            if cached_lang is not None:
+                return cached_lang
             
-            # Log API key details
-            self.logger.info(f"Attempting language detection with API key length: {len(self.detect_api_key) if self.detect_api_key else 0}")
-            self.logger.info(f"Text to detect: {cleaned_text[:100]}...")  # Log first 100 chars
+            # Answer locally when the text's words or script make it obvious
+            detected_lang = self._fast_detect(cleaned_text)
+            if detected_lang:
+                self.logger.debug("Detected language locally: %s", detected_lang)
+                self._detection_cache[key] = detected_lang
+                return detected_lang
+            
+            # Then the local statistical detector; the paid API is only the fallback
+            detected_lang = self._local_detect(cleaned_text)
+            if detected_lang:
+                self.logger.debug("Detected language with langdetect: %s", detected_lang)
+                self._detection_cache[key] = detected_lang
+                return detected_lang
+            
+            # Drop English function words (mixed-in English, "RT", UI labels)
+            # so the API judges the rest, and gets a shorter body to read
+            cleaned_text = ' '.join(
+                word for word in cleaned_text.split() if word.lower() not in EN_STOPWORDS
+            ) or cleaned_text
             
             # Ensure API key is not empty or None
             if not self.detect_api_key:
@@ -64,16 +193,82 @@ class TranslationService:
                 return None
                 
             # Make the API call
-            detected_lang = single_detection(cleaned_text, api_key=self.detect_api_key)
-            self.logger.info(f"Successfully detected language: {detected_lang}")
+            self.logger.debug("Detecting language with the API: %.100s", cleaned_text)
+            detected_lang = self._request_detection(cleaned_text)
+            self.logger.debug("Detected language with the API: %s", detected_lang)
+            if detected_lang:
+                self._detection_cache[key] = detected_lang
             return detected_lang
             
         except Exception as e:
-            self.logger.error(f"Language detection error: {str(e)}")
+            self.logger.error("Language detection error: %s", e)
             if hasattr(e, 'response') and e.response is not None:
-                self.logger.error(f"Response status code: {e.response.status_code}")
-                self.logger.error(f"Response text: {e.response.text}")
+                self.logger.error("Response status code: %s", e.response.status_code)
+                self.logger.error("Response text: %s", e.response.text)
+            return None
+
+    @staticmethod
+    def _local_detect(text):
+        """
+        Detect the language with langdetect, without a network call
+        
+        :param text: Cleaned text
+        :return: Base language code (e.g. 'zh' for 'zh-cn'), or None if
+                 undetectable or not confident enough
+        """
+        if not text.strip():
+            return None
+        try:
+            detector = _langdetect_factory().create()
+            detector.append(text)
+            probabilities = detector.get_probabilities()
+        except LangDetectException:
+            return None
+        # Empty when every language falls below langdetect's own threshold
+        if not probabilities:
+            return None
+        best = probabilities[0]
+        if best.prob < LANGDETECT_MIN_CONFIDENCE:
             return None
+        return best.lang.split('-')[0]
+
+    @staticmethod
+    def _fast_detect(text):
+        """
+        Guess the language without a network call when the answer is obvious
+        
+        :param text: Cleaned text
+        :return: Language code, or None if the remote API should decide
+        """
+        if text.isascii() or _is_mostly_ascii(text):
+            words = text.lower().split()
+            hits = sum(1 for word in words if word in EN_STOPWORDS)
+            if hits >= EN_MIN_STOPWORDS and hits >= EN_MIN_STOPWORD_SHARE * len(words):
+                return 'en'
+            return None
+        
+        # Count letters per single-language script
+        letters = 0
+        counts = {}
+        for char in text:
+            if not char.isalpha():
+                continue
+            letters += 1
+            if char.isascii():
+                continue
+            name = unicodedata.name(char, '')
+            for prefix, language in SCRIPT_LANGUAGES:
+                if name.startswith(prefix):
+                    counts[language] = counts.get(language, 0) + 1
+                    break
+        
+        if not counts:
+            return None
+        # Japanese mixes kana with CJK ideographs
+        if 'ja' in counts:
+            counts['ja'] += counts.pop('zh', 0)
+        language, count = max(counts.items(), key=lambda item: item[1])
+        return language if count * 2 > letters else None
 
     def translate_text(self, text, source_language):
         """
@@ -83,26 +278,163 @@ class TranslationService:
         :param source_language: Source language code
         :return: Translated text
         """
+        # English needs no translation (the target is always English)
+        if not source_language or source_language == 'en':
+            return text
         try:
-            return self.translator.translate(
-                text,
-                source=source_language,
-                target='en'
-            )
+            key = self._translation_key(text, source_language)
+            cached_translation = self._translation_cache.get(key)
+            if cached_translation is not None:
+                return cached_translation
+            
+            translated_text = self._request_translation(text, source_language)
+            if translated_text:
+                self._translation_cache[key] = translated_text
+            return translated_text
         except Exception as e:
-            logging.error(f"Translation error: {e}")
+            self.logger.error("Translation error: %s", e)
             return None
 
+    def translate_texts(self, texts, source_languages):
+        """
+        Translate several texts to English, each from its own source language.
+        Texts in the same language share requests (see translate_batch) and
+        the languages are translated concurrently.
+        
+        :param texts: List of texts to translate
+        :param source_languages: Source language code of each text
+        :return: List of translations in the same order (None where translation failed)
+        """
+        groups = {}  # Source language -> indexes of its texts
+        for i, source_language in enumerate(source_languages):
+            groups.setdefault(source_language, []).append(i)
+        
+        futures = {
+            source_language: self._pool.submit(self.translate_batch, [texts[i] for i in indexes], source_language)
+            for source_language, indexes in groups.items()
+        }
+        translations = [None] * len(texts)
+        for source_language, indexes in groups.items():
+            for i, translated_text in zip(indexes, futures[source_language].result()):
+                translations[i] = translated_text
+        return translations
+
+    @retry_with_backoff(max_attempts=3, max_concurrent=API_CONCURRENCY, rate_limiter=DETECT_RATE_LIMITER)
+    def _request_detection(self, text):
+        """Call the detection API, retrying when throttled"""
+        return single_detection(text, api_key=self.detect_api_key)
+
+    @retry_with_backoff(max_attempts=3, max_concurrent=API_CONCURRENCY, rate_limiter=TRANSLATE_RATE_LIMITER)
+    def _request_translation(self, text, source_language):
+        """Call the translation API, retrying when throttled"""
+        return self._get_translator(source_language).translate(text)
+
+    def _get_translator(self, source_language):
+        """
+        GoogleTranslator from source_language to English for the calling
+        thread, built on first use (translate() ignores a source argument)
+        
+        :param source_language: Source language code
+        :return: GoogleTranslator
+        """
+        translators = getattr(self._local, 'translators', None)
+        if translators is None:
+            translators = self._local.translators = {}
+        translator = translators.get(source_language)
+        if translator is None:
+            try:
+                translator = GoogleTranslator(source=source_language, target='en')
+            except LanguageNotSupportedException:
+                # Detection codes don't always match Google's (e.g. 'zh' for 'zh-CN'),
+                # let Google work out the source language instead
+                self.logger.debug("Google Translate has no language %s, detecting it instead", source_language)
+                translator = GoogleTranslator(source='auto', target='en')
+            translators[source_language] = translator
+        return translator
+
+    @staticmethod
+    def _translation_key(text, source_language):
+        """Cache key of a translation: text hash followed by the source language"""
+        return text_key(text) + (source_language or '').encode('utf-8')
+
+    def translate_batch(self, texts, source_language):
+        """
+        Translate several short texts (e.g. the OCR fragments of one image,
+        or a batch of tweets) to English with as few requests as possible
+        
+        :param texts: List of texts to translate
+        :param source_language: Source language code
+        :return: List of translations in the same order (None where translation failed)
+        """
+        if not source_language or source_language == 'en':
+            return list(texts)
+        translations = [None] * len(texts)
+        chunk = []  # Indexes of the texts sent in the next request
+        chunk_length = 0
+        first_index = {}  # Text -> index of its first occurrence
+        duplicates = []  # (index, index of the first occurrence)
+        for i, text in enumerate(texts):
+            if not text.strip():
+                translations[i] = text
+                continue
+            # Repeated fragments (hashtags, handles, "RT") are translated once
+            if text in first_index:
+                duplicates.append((i, first_index[text]))
+                continue
+            first_index[text] = i
+            # Recurring fragments (slogans, watermarks, UI labels) are answered from the cache
+            cached_translation = self._translation_cache.get(self._translation_key(text, source_language))
+            if cached_translation is not None:
+                translations[i] = cached_translation
+                continue
+            if chunk and chunk_length + len(text) + len(BATCH_SEPARATOR) > TRANSLATE_MAX_CHARS:
+                self._translate_chunk(texts, chunk, translations, source_language)
+                chunk, chunk_length = [], 0
+            chunk.append(i)
+            chunk_length += len(text) + len(BATCH_SEPARATOR)
+        if chunk:
+            self._translate_chunk(texts, chunk, translations, source_language)
+        for i, first in duplicates:
+            translations[i] = translations[first]
+        return translations
+
+    def _translate_chunk(self, texts, indexes, translations, source_language):
+        """Translate texts[i] for i in indexes with one request, filling translations in place"""
+        joined = BATCH_SEPARATOR.join(texts[i].replace(BATCH_SEPARATOR, ' ') for i in indexes)
+        translated = self.translate_text(joined, source_language)
+        if not translated:
+            # The request itself failed (already retried), one request per text would
+            # only fail again; the texts' entries stay None
+            self.logger.warning("Batch translation of %s texts failed", len(indexes))
+            return
+        parts = translated.split(BATCH_SEPARATOR)
+        if len(parts) == len(indexes):
+            for i, part in zip(indexes, parts):
+                translations[i] = part.strip()
+                if translations[i]:
+                    self._translation_cache[self._translation_key(texts[i], source_language)] = translations[i]
+            return
+        
+        # The translation merged or split lines, fall back to one request per text
+        self.logger.warning("Batch translation returned %s lines for %s texts, translating individually",
+                            len(parts), len(indexes))
+        for i in indexes:
+            translations[i] = self.translate_text(texts[i], source_language)
+
     def prepare_tweet(self, original_text, detected_language):
         """
         Prepare tweet text with language indicator
         
         :param original_text: Original tweet text
         :param detected_language: Detected language code
-        :return: Formatted tweet text
+        :return: Formatted tweet text, or None if the tweet needs no repost
         """
-        # Clean the text
-        cleaned_text = TweetProcessor.clean_tweet_text(original_text)
+        # English tweets are reposted as they are, nothing to prepare
+        if not detected_language or detected_language == 'en':
+            return None
+        
+        # Clean the text, dropping what couldn't fit in the repost anyway
+        cleaned_text = TweetProcessor.clean_tweet_text(original_text)[:REPOST_SOURCE_LIMIT]
         
         # Translate the text
         translated_text = self.translate_text(cleaned_text, detected_language)
@@ -111,7 +443,7 @@ class TranslationService:
             return None
         
         # Create repost text with language indicator
-        repost_text = f"({detected_language} → en):\n\n{translated_text}"
+        repost_text = REPOST_TEMPLATE.format(language=detected_language, text=translated_text)
         
         # Truncate if necessary
         return TweetProcessor.truncate_tweet(repost_text)
\ No newline at end of file
@@ -1,6 +1,12 @@
 # tweet_processor.py
+import re
 import logging
 
+TWEET_MAX_LENGTH = 280  # Twitter's character limit
+
+# Links (t.co and others) carry nothing to detect or translate
+_URL_RE = re.compile(r'https?://\S+')
+
 class TweetProcessor:
     @staticmethod
     def clean_tweet_text(tweet_text):
@@ -11,18 +17,22 @@ class TweetProcessor:
         :return: Cleaned tweet text
         """
         try:
-            # Remove URLs
-            import re
-            tweet_text = re.sub(r'http\S+', '', tweet_text)
-            
-            # Remove extra whitespace
-            tweet_text = ' '.join(tweet_text.split())
-            
-            return tweet_text
+            # Remove URLs and extra whitespace
+            return ' '.join(_URL_RE.sub('', tweet_text).split())
         except Exception as e:
             logging.error(f"Error cleaning tweet text: {e}")
             return tweet_text
 
+    @staticmethod
+    def _retweeted_ref(tweet):
+        """
+        Reference to the tweet a retweet points at
+        
+        :param tweet: Tweet object
+        :return: The 'retweeted' referenced tweet, or None if it's not a retweet
+        """
+        return next((ref for ref in (tweet.referenced_tweets or ()) if ref.type == 'retweeted'), None)
+
     @staticmethod
     def is_retweet(tweet):
         """
@@ -32,34 +42,36 @@ class TweetProcessor:
         :return: Boolean indicating if it's a retweet
         """
         try:
-            return (tweet.referenced_tweets and 
-                    any(ref.type == 'retweeted' for ref in tweet.referenced_tweets))
+            return TweetProcessor._retweeted_ref(tweet) is not None
         except Exception as e:
             logging.error(f"Error checking if tweet is a retweet: {e}")
             return False
 
     @staticmethod
-    def extract_original_tweet_text(tweet, twitter_client):
+    def extract_original_tweet_text(tweet, twitter_client, original_texts=None):
         """
         Extract original tweet text for retweets
         
         :param tweet: Tweet object
         :param twitter_client: TwitterClient instance
+        :param original_texts: Optional dict of tweet ID -> text already looked
+                               up in bulk; the original is only fetched on its own if missing
         :return: Original tweet text
         """
         try:
-            if TweetProcessor.is_retweet(tweet):
-                for ref in tweet.referenced_tweets:
-                    if ref.type == 'retweeted':
-                        original_tweet = twitter_client.get_tweet(ref.id, tweet_fields=['text'])
-                        return original_tweet.data.text if original_tweet.data else tweet.text
+            ref = TweetProcessor._retweeted_ref(tweet)
+            if ref is not None and original_texts and ref.id in original_texts:
+                return original_texts[ref.id]
+            if ref is not None:
+                original_tweet = twitter_client.get_tweet(ref.id, tweet_fields=['text'])
+                return original_tweet.data.text if original_tweet.data else tweet.text
             return tweet.text
         except Exception as e:
             logging.error(f"Error extracting original tweet text: {e}")
             return tweet.text
 
     @staticmethod
-    def truncate_tweet(text, max_length=280):
+    def truncate_tweet(text, max_length=TWEET_MAX_LENGTH):
         """
         Truncate tweet text to fit Twitter's character limit
         
@@ -1,23 +1,176 @@
 # twitter_client.py
 import os
+import re
+import json
+import time
 import tweepy
 import logging
+import requests
+import threading
+import contextlib
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from tweet_processor import TweetProcessor
-from dotenv import load_dotenv
 from config import Config
+from http_session import create_session
+from retry import TRANSIENT_STATUS_CODES
+from cache import LRUCache, text_key
 
-# Load environment variables from .env file
-load_dotenv()
+# Number of recently posted texts remembered to avoid posting duplicates
+POSTED_HASHES_LIMIT = 1000
+# Bytes of a posted-text hash (the digest size of text_key)
+POSTED_HASH_SIZE = len(text_key(''))
+
+# Statuses the Twitter session retries itself (tweepy handles 429)
+TWITTER_RETRY_STATUS_CODES = TRANSIENT_STATUS_CODES - {429}
+
+# Media URLs remembered by tweet ID
+MEDIA_URL_CACHE_SIZE = 4096
+
+# Fields requested for media lookups: the attachments link a tweet to its
+# media keys; photos need url, videos the variants. Nothing else is read.
+MEDIA_TWEET_FIELDS = ['attachments']
+MEDIA_FIELDS = ['url', 'type', 'variants']
+
+# Batches of media lookups sent at the same time by get_media_urls
+MEDIA_LOOKUP_WORKERS = 8
+
+# Fields requested for mentions, whether polled or streamed
+MENTION_TWEET_FIELDS = ['text', 'entities', 'attachments', 'referenced_tweets']
+
+# Nearly spent rate-limit budgets are saved here, so a restart doesn't burst
+# through what is left of the window
+RATE_LIMIT_STATE_FILE = "rate_limits.json"
+
+class ProactiveRateLimiter:
+    """
+    Tracks the x-rate-limit-* headers of each endpoint and spaces out calls
+    when an endpoint's budget is nearly spent, instead of running into 429s
+    """
+    def __init__(self, threshold=2, state_file=RATE_LIMIT_STATE_FILE):
+        """
+        :param threshold: Remaining requests at or below which calls are paced
+        :param state_file: File low budgets are kept in across restarts (None to keep them in memory only)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.threshold = threshold
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._limits = self._load_state()  # endpoint -> (remaining, reset timestamp)
+
+    def _load_state(self):
+        """Budgets saved by an earlier run whose window hasn't reset yet"""
+        if not self.state_file:
+            return {}
+        try:
+            with open(self.state_file, 'r') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(saved, dict):
+            return {}
+        now = time.time()
+        limits = {}
+        for endpoint, budget in saved.items():
+            # Skip entries that aren't a [remaining, reset] pair of numbers (a hand-edited or foreign file)
+            try:
+                remaining, reset = (int(value) for value in budget)
+            except (TypeError, ValueError):
+                continue
+            if reset > now:
+                limits[endpoint] = (remaining, reset)
+        return limits
+
+    def _save_state(self):
+        """Write the current budgets to the state file (called with the lock held)"""
+        try:
+            temp_file = f"{self.state_file}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(self._limits, f)
+            os.replace(temp_file, self.state_file)
+        except OSError as e:
+            self.logger.error("Error saving rate limit state: %s", e)
+
+    @staticmethod
+    def endpoint(route):
+        """Rate limits apply per endpoint, not per tweet/user ID in the route"""
+        return re.sub(r'/\d+', '/:id', route)
+
+    def wait(self, route):
+        """Sleep if the endpoint's remaining budget is low"""
+        with self._lock:
+            remaining, reset = self._limits.get(self.endpoint(route), (None, 0))
+        if remaining is None or remaining > self.threshold:
+            return
+        # Spread the remaining requests over the rest of the window
+        delay = max(0, reset - time.time()) / max(remaining, 1)
+        if delay > 0:
+            self.logger.info("Rate limit budget low for %s (%s left), waiting %.0f seconds",
+                             self.endpoint(route), remaining, delay)
+            time.sleep(delay)
+
+    def update(self, route, headers):
+        """Record the budget reported by a response"""
+        try:
+            remaining = int(headers['x-rate-limit-remaining'])
+            reset = int(headers['x-rate-limit-reset'])
+        except (KeyError, ValueError):
+            return
+        with self._lock:
+            self._limits[self.endpoint(route)] = (remaining, reset)
+            # Only a low budget makes wait() sleep, so that's all a restart needs;
+            # anything saved earlier expires with its window
+            if self.state_file and remaining <= self.threshold:
+                self._save_state()
+
+class RateLimitedClient(tweepy.Client):
+    """tweepy.Client that paces itself with a ProactiveRateLimiter"""
+    def __init__(self, *args, rate_limiter=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rate_limiter = rate_limiter or ProactiveRateLimiter()
+
+    def request(self, method, route, params=None, json=None, user_auth=False):
+        self.rate_limiter.wait(route)
+        response = super().request(method, route, params=params, json=json, user_auth=user_auth)
+        self.rate_limiter.update(route, response.headers)
+        return response
+
+class MentionStream(tweepy.StreamingClient):
+    """Filtered stream that pushes mentions of our account onto a queue"""
+    def __init__(self, bearer_token, mention_queue):
+        super().__init__(bearer_token, wait_on_rate_limit=True)
+        self.logger = logging.getLogger(__name__)
+        self.mention_queue = mention_queue
+        self.failed = threading.Event()  # Set once the stream stops for good
+
+    def on_tweet(self, tweet):
+        self.mention_queue.put(tweet)
+
+    def on_request_error(self, status_code):
+        self.logger.error("Mention stream request failed with status %s", status_code)
+        # The account's access level doesn't include the filtered stream
+        if status_code in (401, 403):
+            self.disconnect()
+
+    def on_disconnect(self):
+        self.failed.set()
 
 class TwitterClient:
-    def __init__(self):
-        self.config = Config()
-        self.credentials = self.config.get_twitter_credentials()
+    def __init__(self, credentials=None):
+        """
+        :param credentials: Dict with BEARER_TOKEN, CONSUMER_KEY, CONSUMER_SECRET,
+                            ACCESS_TOKEN and ACCESS_TOKEN_SECRET; read from the
+                            environment (and .env) when not given
+        """
+        if credentials is None:
+            credentials = Config().get_twitter_credentials()
+        self.credentials = credentials
         self.logger = logging.getLogger(__name__)
         
         # Initialize Client v2 (primary client)
         try:
-            self.client = tweepy.Client(
+            self.client = RateLimitedClient(
                 bearer_token=self.credentials['BEARER_TOKEN'],
                 consumer_key=self.credentials['CONSUMER_KEY'],
                 consumer_secret=self.credentials['CONSUMER_SECRET'],
@@ -25,7 +178,22 @@ class TwitterClient:
                 access_token_secret=self.credentials['ACCESS_TOKEN_SECRET'],
                 wait_on_rate_limit=True
             )
-            self.media_url_cache = {}  # Cache to store tweet_id -> media_url mappings
+            # Keep enough pooled connections for the bot's concurrent workers, and
+            # retry 5xx/connection errors; 429s are left to wait_on_rate_limit,
+            # which waits for the reset time
+            self.client.session = create_session(pool_maxsize=20, retries=3,
+                                                 status_forcelist=TWITTER_RETRY_STATUS_CODES)
+            # tweet_id -> media_url; bounded, the least recently used IDs are evicted
+            self.media_url_cache = LRUCache(maxsize=MEDIA_URL_CACHE_SIZE)
+            self.user_id_cache = {}  # Cache to store username -> user_id mappings (IDs never change)
+            self.tweet_text_cache = LRUCache(maxsize=1024)  # Cache to store tweet_id -> text of retweeted originals
+            
+            # Hashes of recently posted texts, kept across restarts; Twitter
+            # rejects duplicate posts with a 403 after a wasted request
+            self.posted_hashes_file = "posted_hashes.txt"
+            self._posted_lock = threading.Lock()
+            self._posted_order = deque(self._load_posted_hashes(), maxlen=POSTED_HASHES_LIMIT)
+            self._posted_hashes = set(self._posted_order)
             self.logger.info("Successfully initialized Client v2")
             
             # Get and store our own user ID
@@ -45,51 +213,129 @@ class TwitterClient:
         :param username: Twitter username
         :return: User ID or None
         """
+        if username.lower() in self.user_id_cache:
+            return self.user_id_cache[username.lower()]
         try:
             user = self.client.get_user(username=username, user_fields=['id'])
-            return user.data.id if user.data else None
+            if not user.data:
+                return None
+            self.user_id_cache[username.lower()] = user.data.id
+            return user.data.id
         except Exception as e:
             logging.error(f"Error getting user ID for {username}: {e}")
             return None
 
-    def get_latest_non_reply_tweet(self, user_id):
+    def get_user_ids(self, usernames):
+        """
+        Resolve several usernames to user IDs, batching uncached lookups
+        into as few requests as possible (up to 100 usernames per call)
+        
+        :param usernames: List of Twitter usernames
+        :return: Dict of username -> user ID for the usernames that resolved
+        """
+        missing = [u for u in dict.fromkeys(usernames) if u.lower() not in self.user_id_cache]
+        for i in range(0, len(missing), 100):
+            chunk = missing[i:i + 100]
+            try:
+                users = self.client.get_users(usernames=chunk, user_fields=['id'])
+                for user in users.data or []:
+                    self.user_id_cache[user.username.lower()] = user.id
+            except Exception as e:
+                self.logger.error("Error getting user IDs for %s: %s", chunk, e)
+        return {u: self.user_id_cache[u.lower()] for u in usernames if u.lower() in self.user_id_cache}
+
+    def get_latest_non_reply_tweet(self, user_id, since_id=None):
         """
         Get the latest non-reply tweet for a user
         
         :param user_id: Twitter user ID
+        :param since_id: Only consider tweets newer than this ID (e.g. the last
+                         one handled), so a poll with nothing new returns no data
         :return: Latest tweet or None
         """
         try:
+            params = {'since_id': since_id} if since_id else {}
             tweets = self.client.get_users_tweets(
                 id=user_id,
                 max_results=10,
                 tweet_fields=['text', 'created_at', 'referenced_tweets', 'in_reply_to_user_id'],
-                exclude=['replies']
+                exclude=['replies'],
+                **params
             )
             
             if not tweets.data:
                 return None
             
-            # Filter out any remaining replies
-            non_reply_tweets = [
-                tweet for tweet in tweets.data 
-                if tweet.in_reply_to_user_id is None
-            ]
+            # Take the newest tweet that isn't a reply (exclude=replies can miss
+            # some), stopping at the first match
+            latest_post = next(
+                (tweet for tweet in tweets.data if tweet.in_reply_to_user_id is None),
+                None
+            )
             
-            if not non_reply_tweets:
+            if latest_post is None:
                 return None
-                
-            latest_post = non_reply_tweets[0]
             
-            # Handle retweets using the TweetProcessor
-            if TweetProcessor.is_retweet(latest_post):
-                latest_post.text = TweetProcessor.extract_original_tweet_text(latest_post, self.client)
+            # Retweets carry a truncated text; fetch the originals of every
+            # retweet in the window at once so later polls find them cached
+            retweeted_ids = [ref.id for tweet in tweets.data
+                             for ref in (tweet.referenced_tweets or [])
+                             if ref.type == 'retweeted']
+            if retweeted_ids and TweetProcessor.is_retweet(latest_post):
+                latest_post.text = TweetProcessor.extract_original_tweet_text(
+                    latest_post, self.client, original_texts=self.get_tweet_texts(retweeted_ids)
+                )
             
             return latest_post
         except Exception as e:
             logging.error(f"Error getting latest non-reply tweet: {e}")
             return None
     
+    def get_tweet_texts(self, tweet_ids):
+        """
+        Get the text of several tweets, looking up uncached IDs in batches of 100
+        
+        :param tweet_ids: List of tweet IDs
+        :return: Dict of tweet ID -> text for the tweets that were found
+        """
+        missing = [tweet_id for tweet_id in dict.fromkeys(tweet_ids) if tweet_id not in self.tweet_text_cache]
+        for i in range(0, len(missing), 100):
+            try:
+                tweets = self.client.get_tweets(ids=missing[i:i + 100], tweet_fields=['text'])
+                for tweet in tweets.data or []:
+                    self.tweet_text_cache[tweet.id] = tweet.text
+            except Exception as e:
+                self.logger.error("Error getting tweets %s: %s", missing[i:i + 100], e)
+        
+        texts = {}
+        for tweet_id in tweet_ids:
+            text = self.tweet_text_cache.get(tweet_id)
+            if text is not None:
+                texts[tweet_id] = text
+        return texts
+
+    def get_tweets(self, tweet_ids):
+        """
+        Get several tweets using v2 API, in batches of 100 IDs per request
+        
+        :param tweet_ids: List of tweet IDs
+        :return: Dict of tweet ID -> tweet for the tweets that were found
+        """
+        unique_ids = list(dict.fromkeys(tweet_ids))
+        tweets = {}
+        for i in range(0, len(unique_ids), 100):
+            try:
+                response = self.client.get_tweets(
+                    ids=unique_ids[i:i + 100],
+                    tweet_fields=['text', 'entities', 'attachments', 'author_id']
+                )
+                for tweet in response.data or []:
+                    tweets[tweet.id] = tweet
+            except (tweepy.errors.TweepyException, requests.RequestException) as e:
+                # Keep what earlier batches found; callers look up the rest one by one
+                self.logger.error("Error getting tweets %s: %s", unique_ids[i:i + 100], e)
+        return tweets
+
     def get_tweet(self, tweet_id):
         """Get tweet using v2 API"""
         try:
@@ -107,6 +353,68 @@ class TwitterClient:
                 self.logger.error(f"Response text: {e.response.text}")
             return None
 
+    def _load_posted_hashes(self):
+        """Load the most recent posted-text hashes from file"""
+        # One hex digest per line; split() drops newlines and blank lines in C
+        lines = []
+        with contextlib.suppress(FileNotFoundError):
+            lines = Path(self.posted_hashes_file).read_text().split()
+        
+        # Drop old entries from the file so it stays bounded
+        if len(lines) > POSTED_HASHES_LIMIT:
+            lines = lines[-POSTED_HASHES_LIMIT:]
+            temp_file = f"{self.posted_hashes_file}.tmp"
+            with open(temp_file, 'w') as f:
+                f.write(''.join(f"{line}\n" for line in lines))
+            os.replace(temp_file, self.posted_hashes_file)
+        
+        hashes = []
+        for line in lines:
+            # A crash while appending can leave a truncated last line
+            try:
+                key = bytes.fromhex(line)
+            except ValueError:
+                key = None
+            if key is None or len(key) != POSTED_HASH_SIZE:
+                self.logger.warning("Skipping corrupt line in %s: %r", self.posted_hashes_file, line)
+                continue
+            hashes.append(key)
+        return hashes
+
+    def _reserve_post(self, text):
+        """
+        Check that we haven't posted exactly this text recently and reserve it,
+        so a concurrent worker posting the same text is turned away before its request
+        
+        :param text: Text about to be posted
+        :return: Hash of the text to pass to _remember_post or _release_post,
+                 or None if the text is a duplicate
+        """
+        key = text_key(text)
+        with self._posted_lock:
+            if key in self._posted_hashes:
+                return None
+            self._posted_hashes.add(key)
+        return key
+
+    def _release_post(self, key):
+        """Drop the reservation of a text whose post failed, so it can be posted later"""
+        with self._posted_lock:
+            self._posted_hashes.discard(key)
+
+    def _remember_post(self, key):
+        """Record a successfully posted text, from its _reserve_post hash"""
+        with self._posted_lock:
+            if len(self._posted_order) == self._posted_order.maxlen:
+                self._posted_hashes.discard(self._posted_order[0])
+            self._posted_order.append(key)
+            self._posted_hashes.add(key)
+            try:
+                with open(self.posted_hashes_file, 'a') as f:
+                    f.write(f"{key.hex()}\n")
+            except OSError as e:
+                self.logger.error("Error saving posted text hash: %s", e)
+
     def create_tweet(self, text):
         """
         Create a new tweet
@@ -114,75 +422,114 @@ class TwitterClient:
         :param text: Text of the tweet
         :return: Tweet response or None
         """
+        # Ensure tweet is within character limit
+        tweet_text = TweetProcessor.truncate_tweet(text)
+        
+        key = self._reserve_post(tweet_text)
+        if key is None:
+            self.logger.info("Skipping tweet identical to one already posted")
+            return None
+        
         try:
-            # Ensure tweet is within character limit
-            tweet_text = TweetProcessor.truncate_tweet(text)
-            
             response = self.client.create_tweet(text=tweet_text)
-            return response.data
         except tweepy.errors.Forbidden as e:
-            logging.error(f"403 Forbidden error when posting tweet: {e}")
+            self._release_post(key)
+            self.logger.error("403 Forbidden error when posting tweet: %s", e)
             return None
         except tweepy.errors.TooManyRequests as e:
-            logging.error(f"Rate limit exceeded when posting tweet: {e}")
+            self._release_post(key)
+            self.logger.error("Rate limit exceeded when posting tweet: %s", e)
             raise
         except Exception as e:
-            logging.error(f"Unexpected error when posting tweet: {e}")
+            self._release_post(key)
+            self.logger.error("Unexpected error when posting tweet: %s", e)
             return None
+        self._remember_post(key)
+        return response.data
 
     def post_reply(self, tweet_id, reply_text):
         """Post a reply to a tweet"""
+        key = self._reserve_post(reply_text)
+        if key is None:
+            self.logger.info("Skipping reply to tweet %s identical to one already posted", tweet_id)
+            return None
+        
         try:
             response = self.client.create_tweet(
                 text=reply_text,
                 in_reply_to_tweet_id=tweet_id
             )
-            self.logger.info(f"Successfully posted reply to tweet {tweet_id}")
-            return response
-            
         except Exception as e:
-            self.logger.error(f"Error posting reply to tweet {tweet_id}: {str(e)}")
+            self._release_post(key)
+            self.logger.error("Error posting reply to tweet %s: %s", tweet_id, e)
             return None
+        self._remember_post(key)
+        self.logger.info("Successfully posted reply to tweet %s", tweet_id)
+        return response
 
-    def get_user_tweets(self, count=10):
-        """Get tweets from our own account"""
+    def get_user_tweets(self, count=10, since_id=None):
+        """
+        Get tweets from our own account
+        
+        :param count: Maximum number of tweets to return; beyond the 100 a
+                      page holds, the following pages are requested
+        :param since_id: Only return tweets newer than this tweet ID
+        :return: List of tweets, newest first
+        """
         try:
-            tweets = self.client.get_users_tweets(
-                self.user_id,
-                max_results=count,
-                tweet_fields=['text', 'entities', 'attachments']
-            )
-            self.logger.info(f"Successfully retrieved {count} tweets from our account")
-            return tweets.data if tweets.data else []
+            tweets = []
+            params = {'since_id': since_id} if since_id else {}
+            while len(tweets) < count:
+                response = self.client.get_users_tweets(
+                    self.user_id,
+                    # The endpoint returns between 5 and 100 tweets per page
+                    max_results=min(max(count - len(tweets), 5), 100),
+                    tweet_fields=['text', 'entities', 'attachments'],
+                    **params
+                )
+                tweets.extend(response.data or [])
+                next_token = response.meta.get('next_token')
+                if not next_token:
+                    break
+                params['pagination_token'] = next_token
+            self.logger.info("Successfully retrieved %s tweets from our account", len(tweets[:count]))
+            return tweets[:count]
             
         except Exception as e:
             self.logger.error(f"Error getting tweets from our account: {str(e)}")
             return []
 
-    def get_mentions(self, count=10):
-        """Get mentions of our account"""
+    def get_mentions(self, count=10, since_id=None):
+        """
+        Get mentions of our account
+        
+        :param count: Maximum number of mentions to return
+        :param since_id: Only return mentions newer than this tweet ID
+        :return: List of mentions, newest first
+        """
         try:
-            self.logger.info(f"Attempting to get mentions for user ID: {self.user_id}")
-            self.logger.info(f"Requesting {count} mentions")
+            self.logger.debug("Requesting %s mentions for user ID %s", count, self.user_id)
             
             mentions = self.client.get_users_mentions(
                 self.user_id,
                 max_results=count,
-                tweet_fields=['text', 'entities', 'attachments', 'referenced_tweets']
+                since_id=since_id,
+                tweet_fields=MENTION_TWEET_FIELDS
             )
             
-            # Log the raw response
-            self.logger.info(f"Raw mentions response: {mentions}")
+            # Nothing new since the last check
+            if since_id and not mentions.data:
+                self.logger.debug("No mentions newer than %s", since_id)
+                return []
             
-            # Log if we got any data
+            # Log what we got; the per-mention details only when debugging
             if mentions.data:
-                mentions_count = len(mentions.data)
-                self.logger.info(f"Successfully retrieved {mentions_count} mention(s)")
-                # Log details of each mention
-                for i, mention in enumerate(mentions.data, 1):
-                    self.logger.info(f"Mention {i}: ID={mention.id}, Text={mention.text[:100]}...")
-                    if hasattr(mention, 'referenced_tweets'):
-                        self.logger.info(f"Mention {i} references: {mention.referenced_tweets}")
+                self.logger.info("Retrieved %s mention(s)", len(mentions.data))
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    for i, mention in enumerate(mentions.data, 1):
+                        self.logger.debug("Mention %s: ID=%s, Text=%.100s...", i, mention.id, mention.text)
+                        if mention.referenced_tweets:
+                            self.logger.debug("Mention %s references: %s", i, mention.referenced_tweets)
             else:
                 self.logger.info("No mentions data received from API")
             
@@ -195,89 +542,153 @@ class TwitterClient:
                 self.logger.error(f"Response text: {e.response.text}")
             return []
 
+    def start_mention_stream(self, mention_queue):
+        """
+        Start receiving mentions of our account from the filtered stream
+        
+        :param mention_queue: Queue that streamed mentions are put on
+        :return: Running MentionStream, or None if the stream isn't available
+        """
+        rule = f"@{self.username} -from:{self.username}"
+        try:
+            stream = MentionStream(self.credentials['BEARER_TOKEN'], mention_queue)
+            
+            # Keep exactly our rule on the stream
+            existing = stream.get_rules().data or []
+            stale = [r.id for r in existing if r.value != rule]
+            if stale:
+                stream.delete_rules(stale)
+            if not any(r.value == rule for r in existing):
+                stream.add_rules(tweepy.StreamRule(rule))
+            
+            stream.filter(threaded=True, tweet_fields=MENTION_TWEET_FIELDS)
+            self.logger.info("Started mention stream with rule: %s", rule)
+            return stream
+            
+        except Exception as e:
+            self.logger.warning("Filtered stream unavailable, falling back to polling: %s", e)
+            return None
+
     def get_media_url(self, tweet_id):
         """Get media URL for a tweet"""
         try:
-            # Check cache first
-            if tweet_id in self.media_url_cache:
-                self.logger.info(f"Using cached media URL for tweet {tweet_id}")
-                return self.media_url_cache[tweet_id]
+            # Check cache first (keyed by str ID, whether the caller passed str or int)
+            cached_url = self.media_url_cache.get(str(tweet_id))
+            if cached_url is not None:
+                self.logger.info("Using cached media URL for tweet %s", tweet_id)
+                return cached_url
 
             # Get the tweet with all necessary fields
             tweet = self.client.get_tweet(
                 tweet_id, 
-                tweet_fields=['attachments', 'entities', 'author_id'],
+                tweet_fields=MEDIA_TWEET_FIELDS,
                 expansions=['attachments.media_keys'],
-                media_fields=['url', 'type', 'variants', 'preview_image_url']
+                media_fields=MEDIA_FIELDS
             )
             
             if not tweet:
-                self.logger.warning(f"Could not get tweet {tweet_id}")
+                self.logger.warning("Could not get tweet %s", tweet_id)
                 return None
 
             # Log the full tweet data for debugging
-            self.logger.debug(f"Tweet data for {tweet_id}: {tweet}")
+            self.logger.debug("Tweet data for %s: %s", tweet_id, tweet)
 
             # Check for media in includes (v2 API format)
-            if hasattr(tweet, 'includes') and 'media' in tweet.includes:
-                for media in tweet.includes['media']:
-                    if media.type == 'photo':
-                        url = media.url
-                        self.media_url_cache[tweet_id] = url
-                        self.logger.info(f"Found photo media URL for tweet {tweet_id}")
-                        return url
-                    elif media.type == 'video':
-                        # For videos, get the highest quality variant
-                        variants = getattr(media, 'variants', [])
-                        video_variants = [v for v in variants if v.get('content_type') == 'video/mp4']
-                        if video_variants:
-                            # Sort by bitrate and get the highest quality
-                            video_variants.sort(key=lambda x: x.get('bitrate', 0), reverse=True)
-                            url = video_variants[0]['url']
-                            self.media_url_cache[tweet_id] = url
-                            self.logger.info(f"Found video media URL for tweet {tweet_id}")
-                            return url
-
-            # Check for media in entities (legacy format)
-            if hasattr(tweet, 'entities') and 'media' in tweet.entities:
-                for media in tweet.entities['media']:
-                    if media['type'] == 'photo':
-                        url = media['media_url_https']
-                        self.media_url_cache[tweet_id] = url
-                        self.logger.info(f"Found photo media URL in entities for tweet {tweet_id}")
-                        return url
-                    elif media['type'] == 'video':
-                        variants = media.get('video_info', {}).get('variants', [])
-                        video_variants = [v for v in variants if v['content_type'] == 'video/mp4']
-                        if video_variants:
-                            video_variants.sort(key=lambda x: x.get('bitrate', 0), reverse=True)
-                            url = video_variants[0]['url']
-                            self.media_url_cache[tweet_id] = url
-                            self.logger.info(f"Found video media URL in entities for tweet {tweet_id}")
-                            return url
-
-            # Check for media in attachments
-            if hasattr(tweet, 'attachments') and tweet.attachments:
-                for attachment in tweet.attachments:
-                    if attachment.type == 'photo':
-                        url = attachment.url
-                        self.media_url_cache[tweet_id] = url
-                        self.logger.info(f"Found photo media URL in attachments for tweet {tweet_id}")
-                        return url
-                    elif attachment.type == 'video':
-                        url = attachment.url
-                        self.media_url_cache[tweet_id] = url
-                        self.logger.info(f"Found video media URL in attachments for tweet {tweet_id}")
-                        return url
-
-            self.logger.warning(f"No media found in tweet {tweet_id}")
+            url = self._select_media_url(tweet.includes.get('media', []))
+            if url:
+                self.media_url_cache[str(tweet_id)] = url
+                self.logger.info("Found media URL for tweet %s", tweet_id)
+                return url
+
+            self.logger.warning("No media found in tweet %s", tweet_id)
             return None
 
         except Exception as e:
-            self.logger.error(f"Error getting media URL for tweet {tweet_id}: {str(e)}")
+            self.logger.error("Error getting media URL for tweet %s: %s", tweet_id, e)
             return None
 
+    def get_media_urls(self, tweet_ids):
+        """
+        Get the media URLs of several tweets, looking up uncached IDs in
+        batches of 100 per request, with the batches running concurrently
+        
+        :param tweet_ids: List of tweet IDs
+        :return: Dict of tweet ID -> media URL (None for tweets without media
+                 or whose lookup failed)
+        """
+        unique_ids = list(dict.fromkeys(tweet_ids))
+        media_urls = {}
+        missing = []
+        for tweet_id in unique_ids:
+            cached_url = self.media_url_cache.get(str(tweet_id))
+            if cached_url is not None:
+                media_urls[tweet_id] = cached_url
+            else:
+                missing.append(tweet_id)
+        
+        batches = [missing[i:i + 100] for i in range(0, len(missing), 100)]
+        with ThreadPoolExecutor(max_workers=MEDIA_LOOKUP_WORKERS) as pool:
+            for found in pool.map(self._get_media_urls_batch, batches):
+                media_urls.update(found)
+        return {tweet_id: media_urls.get(tweet_id) for tweet_id in unique_ids}
+
+    def _get_media_urls_batch(self, tweet_ids):
+        """
+        Look up the media URLs of up to 100 tweets with one request, caching what is found
+        
+        :param tweet_ids: List of at most 100 tweet IDs
+        :return: Dict of tweet ID -> media URL for the tweets with media
+        """
+        try:
+            response = self.client.get_tweets(
+                ids=tweet_ids,
+                tweet_fields=MEDIA_TWEET_FIELDS,
+                expansions=['attachments.media_keys'],
+                media_fields=MEDIA_FIELDS
+            )
+        except (tweepy.errors.TweepyException, requests.RequestException) as e:
+            self.logger.error("Error getting media for tweets %s: %s", tweet_ids, e)
+            return {}
+        
+        # The media of all tweets come back together, matched up by media key
+        media_by_key = {media.media_key: media for media in response.includes.get('media', [])}
+        requested = {str(tweet_id): tweet_id for tweet_id in tweet_ids}
+        media_urls = {}
+        for tweet in response.data or []:
+            media_keys = (tweet.attachments or {}).get('media_keys', [])
+            url = self._select_media_url(media_by_key[key] for key in media_keys if key in media_by_key)
+            if url:
+                # Keyed by the ID as the caller passed it (str or int)
+                tweet_id = requested.get(str(tweet.id), tweet.id)
+                self.media_url_cache[str(tweet.id)] = url
+                media_urls[tweet_id] = url
+        return media_urls
+
+    @staticmethod
+    def _select_media_url(media_items):
+        """
+        URL of the first photo, or of the highest quality MP4 of the first video
+        
+        :param media_items: tweepy Media objects of a tweet
+        :return: Media URL, or None if there is no usable media
+        """
+        for media in media_items:
+            if media.type == 'photo':
+                return media.url
+            elif media.type == 'video':
+                # For videos, get the highest quality variant
+                variants = getattr(media, 'variants', None) or []
+                best = max((v for v in variants if v.get('content_type') == 'video/mp4'),
+                           key=lambda v: v.get('bitrate', 0), default=None)
+                if best:
+                    return best['url']
+        return None
+
     def get_cached_media_url(self, tweet_id):
-        """Get media URL for a tweet using cached data"""
-        # Simply use the cache from get_media_url
-        return self.get_media_url(tweet_id)
\ No newline at end of file
+        """
+        Get media URL for a tweet from the cache only, without a request
+        
+        :param tweet_id: Tweet ID
+        :return: Media URL, or None if it hasn't been looked up (use get_media_url to fetch it)
+        """
+        return self.media_url_cache.get(str(tweet_id))
\ No newline at end of file
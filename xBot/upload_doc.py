@@ -1,4 +1,4 @@
-from internetarchive import upload, get_item
+from internetarchive import get_session
 import logging
 import os
 from datetime import datetime
@@ -15,6 +15,14 @@ class ArchiveUploader:
         self.access_key = access_key
         self.secret_key = secret_key
         
+        # One session for every upload, so its S3 connections are kept alive
+        self._session = get_session(config={
+            's3': {
+                'access': self.access_key,
+                'secret': self.secret_key
+            }
+        })
+        
         if not access_key or not secret_key:
             self.logger.warning("Missing Archive.org credentials")
         else:
@@ -35,13 +43,16 @@ class ArchiveUploader:
             # Create directory for translations if it doesn't exist
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
             
-            # Create content file with original and translation
+            # Create content file with original and translation, in one write
+            content = (
+                f"Original ({language_from}):\n\n{original_text}\n\n"
+                f"Translation (en):\n\n{translated_text}\n\n"
+                f"Translated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+            )
+            if tweet_id:
+                content += f"Source Tweet ID: {tweet_id}\n"
             with open(file_path, "w", encoding="utf-8") as f:
-                f.write(f"Original ({language_from}):\n\n{original_text}\n\n")
-                f.write(f"Translation (en):\n\n{translated_text}\n\n")
-                f.write(f"Translated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                if tweet_id:
-                    f.write(f"Source Tweet ID: {tweet_id}\n")
+                f.write(content)
             
             # Generate unique identifier
             timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
@@ -63,17 +74,9 @@ class ArchiveUploader:
             if tweet_id:
                 metadata["source"] = f"https://twitter.com/i/web/status/{tweet_id}"
             
-            # Configure S3 credentials
-            config = {
-                's3': {
-                    'access': self.access_key,
-                    'secret': self.secret_key
-                }
-            }
-            
             # Upload the file
             self.logger.info(f"Uploading translation to Archive.org with identifier: {identifier}")
-            response = upload(identifier, files=file_path, metadata=metadata, config=config)
+            response = self._session.get_item(identifier).upload(file_path, metadata=metadata)
             
             # Check if upload was successful
             if response[0].status_code == 200: